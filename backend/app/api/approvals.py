@@ -2,54 +2,118 @@
 Approval API endpoints for the Expense Management System.
 """
 
+import asyncio
 import logging
+from datetime import datetime
 from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Depends, Query, status
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends, Query, status
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, desc
-from sqlalchemy.orm import selectinload
+from sqlalchemy import Boolean, case, func, select, update, and_, or_, desc, bindparam, lambda_stmt
+from sqlalchemy.orm import contains_eager, joinedload
 
-from app.database import get_db
+from app.database import get_db, AsyncSessionLocal
 from app.models import User, Approval, Expense, ApprovalRule
 from app.schemas import (
     ApprovalCreate, ApprovalUpdate, Approval as ApprovalSchema,
-    ApprovalWithDetails, PaginationParams, PaginatedResponse, ApprovalStatus
+    ApprovalWithDetails, PaginationParams, PaginatedResponse, ApprovalStatus, AuditAction, UserRole
 )
 from app.auth import get_current_active_user, require_manager_or_admin
+from app.pagination import parse_cursor_param
 from app.services.approval_service import approval_service
 from app.services.audit_service import audit_service
 from app.services.notification_service import notification_service
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/approvals", tags=["Approvals"])
+router = APIRouter(prefix="/approvals", tags=["Approvals"], default_response_class=ORJSONResponse)
+
+# Converts a page of ORM approvals in one pass instead of one model_validate call per row
+_APPROVAL_LIST = TypeAdapter(List[ApprovalWithDetails])
+
+# Single approval with details, visible to its approver, the expense submitter,
+# or any non-employee. Built once as a lambda statement so its compiled form is cached.
+GET_APPROVAL_STMT = lambda_stmt(
+    lambda: select(Approval)
+    .join(Approval.expense)
+    .where(
+        Approval.id == bindparam("approval_id"),
+        or_(
+            bindparam("unrestricted", type_=Boolean()),
+            Approval.approver_id == bindparam("user_id"),
+            Expense.user_id == bindparam("user_id")
+        )
+    )
+    .options(
+        contains_eager(Approval.expense),
+        joinedload(Approval.approver)
+    )
+)
+
+
+def _build_page(
+    approvals: List[Approval],
+    total_count: Optional[int],
+    next_cursor: Optional[str],
+    pagination: PaginationParams,
+    cursor: Optional[str],
+    total_is_estimate: bool = False
+) -> PaginatedResponse:
+    """Build a paginated response; page/total are omitted in cursor mode."""
+    if cursor:
+        return PaginatedResponse(
+            items=_APPROVAL_LIST.validate_python(approvals, from_attributes=True),
+            size=pagination.size,
+            next_cursor=next_cursor
+        )
+    
+    return PaginatedResponse(
+        items=_APPROVAL_LIST.validate_python(approvals, from_attributes=True),
+        total=total_count,
+        total_is_estimate=total_is_estimate,
+        page=pagination.page,
+        size=pagination.size,
+        pages=(total_count + pagination.size - 1) // pagination.size,
+        next_cursor=next_cursor
+    )
 
 
 @router.get("/pending", response_model=PaginatedResponse)
 async def get_pending_approvals(
     current_user: User = Depends(require_manager_or_admin),
     db: AsyncSession = Depends(get_db),
-    pagination: PaginationParams = Depends()
+    pagination: PaginationParams = Depends(),
+    cursor: Optional[str] = Query(None)
 ):
     """Get pending approvals for the current user."""
     try:
-        approvals, total_count = await approval_service.get_pending_approvals(
+        cursor_key = parse_cursor_param(cursor)
+        page = approval_service.get_pending_page(
             approver=current_user,
             db=db,
             limit=pagination.size,
-            offset=(pagination.page - 1) * pagination.size
+            offset=(pagination.page - 1) * pagination.size,
+            cursor=cursor_key
         )
         
-        return PaginatedResponse(
-            items=[ApprovalWithDetails.from_orm(approval) for approval in approvals],
-            total=total_count,
-            page=pagination.page,
-            size=pagination.size,
-            pages=(total_count + pagination.size - 1) // pagination.size
-        )
+        if cursor_key:
+            approvals, next_cursor = await page
+            return _build_page(approvals, None, next_cursor, pagination, cursor)
+        
+        # Count on a second connection so it runs concurrently with the page fetch
+        async with AsyncSessionLocal() as count_db:
+            (approvals, next_cursor), (total_count, is_estimate) = await asyncio.gather(
+                page,
+                approval_service.count_pending(approver=current_user, db=count_db)
+            )
+        
+        return _build_page(approvals, total_count, next_cursor, pagination, cursor, is_estimate)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting pending approvals: {e}")
         raise HTTPException(
@@ -62,25 +126,35 @@ async def get_pending_approvals(
 async def get_approval_history(
     current_user: User = Depends(require_manager_or_admin),
     db: AsyncSession = Depends(get_db),
-    pagination: PaginationParams = Depends()
+    pagination: PaginationParams = Depends(),
+    cursor: Optional[str] = Query(None)
 ):
     """Get approval history for the current user."""
     try:
-        approvals, total_count = await approval_service.get_approval_history(
+        cursor_key = parse_cursor_param(cursor)
+        page = approval_service.get_history_page(
             approver=current_user,
             db=db,
             limit=pagination.size,
-            offset=(pagination.page - 1) * pagination.size
+            offset=(pagination.page - 1) * pagination.size,
+            cursor=cursor_key
         )
         
-        return PaginatedResponse(
-            items=[ApprovalWithDetails.from_orm(approval) for approval in approvals],
-            total=total_count,
-            page=pagination.page,
-            size=pagination.size,
-            pages=(total_count + pagination.size - 1) // pagination.size
-        )
+        if cursor_key:
+            approvals, next_cursor = await page
+            return _build_page(approvals, None, next_cursor, pagination, cursor)
+        
+        # Count on a second connection so it runs concurrently with the page fetch
+        async with AsyncSessionLocal() as count_db:
+            (approvals, next_cursor), (total_count, is_estimate) = await asyncio.gather(
+                page,
+                approval_service.count_history(approver=current_user, db=count_db)
+            )
+        
+        return _build_page(approvals, total_count, next_cursor, pagination, cursor, is_estimate)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting approval history: {e}")
         raise HTTPException(
@@ -92,6 +166,7 @@ async def get_approval_history(
 @router.post("/{approval_id}/approve")
 async def approve_expense(
     approval_id: UUID,
+    background_tasks: BackgroundTasks,
     comments: Optional[str] = None,
     current_user: User = Depends(require_manager_or_admin),
     db: AsyncSession = Depends(get_db)
@@ -99,11 +174,12 @@ async def approve_expense(
     """Approve an expense."""
     try:
         success, error_message = await approval_service.process_approval(
-            approval_id=str(approval_id),
+            approval_id=approval_id,
             status=ApprovalStatus.approved,
             comments=comments,
             approver=current_user,
-            db=db
+            db=db,
+            background_tasks=background_tasks
         )
         
         if not success:
@@ -128,6 +204,7 @@ async def approve_expense(
 @router.post("/{approval_id}/reject")
 async def reject_expense(
     approval_id: UUID,
+    background_tasks: BackgroundTasks,
     comments: Optional[str] = None,
     current_user: User = Depends(require_manager_or_admin),
     db: AsyncSession = Depends(get_db)
@@ -135,11 +212,12 @@ async def reject_expense(
     """Reject an expense."""
     try:
         success, error_message = await approval_service.process_approval(
-            approval_id=str(approval_id),
+            approval_id=approval_id,
             status=ApprovalStatus.rejected,
             comments=comments,
             approver=current_user,
-            db=db
+            db=db,
+            background_tasks=background_tasks
         )
         
         if not success:
@@ -169,17 +247,16 @@ async def get_approval(
 ):
     """Get a specific approval by ID."""
     try:
-        # Get approval
+        # Permissions are part of the query; forbidden and missing both 404
         result = await db.execute(
-            select(Approval)
-            .where(Approval.id == approval_id)
-            .options(
-                selectinload(Approval.approver),
-                selectinload(Approval.expense).selectinload(Expense.user),
-                selectinload(Approval.expense).selectinload(Expense.category)
-            )
+            GET_APPROVAL_STMT,
+            {
+                "approval_id": approval_id,
+                "user_id": current_user.id,
+                "unrestricted": current_user.role != UserRole.employee
+            }
         )
-        approval = result.scalar_one_or_none()
+        approval = result.unique().scalar_one_or_none()
         
         if not approval:
             raise HTTPException(
@@ -187,16 +264,7 @@ async def get_approval(
                 detail="Approval not found"
             )
         
-        # Check permissions
-        if (current_user.role == "employee" and 
-            approval.expense.user_id != current_user.id and 
-            approval.approver_id != current_user.id):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Access denied"
-            )
-        
-        return ApprovalWithDetails.from_orm(approval)
+        return ApprovalWithDetails.model_validate(approval)
         
     except HTTPException:
         raise
@@ -217,47 +285,61 @@ async def update_approval(
 ):
     """Update an approval (only comments can be updated after approval/rejection)."""
     try:
-        # Get approval
-        result = await db.execute(
-            select(Approval).where(
+        update_data = approval_data.model_dump(exclude_unset=True)
+        
+        # Snapshot the old values in the same statement for the audit trail
+        old = (
+            select(Approval.id, Approval.comments, Approval.status)
+            .where(
                 and_(
                     Approval.id == approval_id,
                     Approval.approver_id == current_user.id
                 )
             )
+            .cte("old")
         )
-        approval = result.scalar_one_or_none()
         
-        if not approval:
+        values = dict(update_data)
+        new_status = update_data.get("status")
+        if new_status is not None:
+            # The decision time follows a status change; history is keyset-paged on it
+            values["approved_at"] = case(
+                (old.c.status == new_status, Approval.approved_at),
+                else_=None if new_status == ApprovalStatus.pending else func.now()
+            )
+        
+        result = await db.execute(
+            update(Approval)
+            .where(Approval.id == old.c.id)
+            .values(**values)
+            .returning(Approval, old.c.comments, old.c.status)
+            .execution_options(synchronize_session=False)
+        )
+        row = result.one_or_none()
+        
+        if not row:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Approval not found or access denied"
             )
         
-        # Store old values for audit
+        approval, old_comments, old_status = row
         old_values = {
-            "comments": approval.comments,
-            "status": approval.status.value
+            "comments": old_comments,
+            "status": old_status.value
         }
         
-        # Update fields
-        update_data = approval_data.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(approval, field, value)
-        
         await db.commit()
-        await db.refresh(approval)
         
         # Log audit trail
-        await audit_service.log_action(
-            company_id=str(current_user.company_id),
-            user_id=str(current_user.id),
-            action="update",
+        audit_service.enqueue(
+            company_id=current_user.company_id,
+            user_id=current_user.id,
+            action=AuditAction.update,
             resource_type="approval",
-            resource_id=str(approval.id),
+            resource_id=approval.id,
             old_values=old_values,
-            new_values=update_data,
-            db=db
+            new_values=update_data
         )
         
         logger.info(f"Updated approval {approval.id}")
@@ -283,8 +365,6 @@ async def get_approval_statistics(
 ):
     """Get approval statistics for dashboard."""
     try:
-        from datetime import datetime
-        
         start_datetime = datetime.fromisoformat(start_date) if start_date else None
         end_datetime = datetime.fromisoformat(end_date) if end_date else None
         
@@ -314,46 +394,41 @@ async def bulk_approve_expenses(
 ):
     """Bulk approve multiple expenses."""
     try:
+        # Results are keyed by ID, so a repeated ID is processed and reported once
+        approval_ids = list(dict.fromkeys(approval_ids))
+        
+        errors = await approval_service.process_bulk(
+            approval_ids=approval_ids,
+            status=ApprovalStatus.approved,
+            comments=comments,
+            approver=current_user,
+            db=db
+        )
+        
         results = []
         success_count = 0
         
-        for approval_id in approval_ids:
-            try:
-                success, error_message = await approval_service.process_approval(
-                    approval_id=str(approval_id),
-                    status=ApprovalStatus.approved,
-                    comments=comments,
-                    approver=current_user,
-                    db=db
-                )
-                
-                if success:
-                    success_count += 1
-                    results.append({
-                        "approval_id": str(approval_id),
-                        "status": "approved"
-                    })
-                else:
-                    results.append({
-                        "approval_id": str(approval_id),
-                        "status": "failed",
-                        "error": error_message
-                    })
-                    
-            except Exception as e:
+        for approval_id, error_message in errors.items():
+            if error_message is None:
+                success_count += 1
+                results.append({
+                    "approval_id": str(approval_id),
+                    "status": "approved"
+                })
+            else:
                 results.append({
                     "approval_id": str(approval_id),
                     "status": "failed",
-                    "error": str(e)
+                    "error": error_message
                 })
         
-        logger.info(f"Bulk approval completed: {success_count}/{len(approval_ids)} successful")
+        logger.info(f"Bulk approval completed: {success_count}/{len(errors)} successful")
         
         return {
-            "message": f"Bulk approval completed: {success_count}/{len(approval_ids)} successful",
-            "total": len(approval_ids),
+            "message": f"Bulk approval completed: {success_count}/{len(errors)} successful",
+            "total": len(errors),
             "successful": success_count,
-            "failed": len(approval_ids) - success_count,
+            "failed": len(errors) - success_count,
             "results": results
         }
         
@@ -374,46 +449,41 @@ async def bulk_reject_expenses(
 ):
     """Bulk reject multiple expenses."""
     try:
+        # Results are keyed by ID, so a repeated ID is processed and reported once
+        approval_ids = list(dict.fromkeys(approval_ids))
+        
+        errors = await approval_service.process_bulk(
+            approval_ids=approval_ids,
+            status=ApprovalStatus.rejected,
+            comments=comments,
+            approver=current_user,
+            db=db
+        )
+        
         results = []
         success_count = 0
         
-        for approval_id in approval_ids:
-            try:
-                success, error_message = await approval_service.process_approval(
-                    approval_id=str(approval_id),
-                    status=ApprovalStatus.rejected,
-                    comments=comments,
-                    approver=current_user,
-                    db=db
-                )
-                
-                if success:
-                    success_count += 1
-                    results.append({
-                        "approval_id": str(approval_id),
-                        "status": "rejected"
-                    })
-                else:
-                    results.append({
-                        "approval_id": str(approval_id),
-                        "status": "failed",
-                        "error": error_message
-                    })
-                    
-            except Exception as e:
+        for approval_id, error_message in errors.items():
+            if error_message is None:
+                success_count += 1
+                results.append({
+                    "approval_id": str(approval_id),
+                    "status": "rejected"
+                })
+            else:
                 results.append({
                     "approval_id": str(approval_id),
                     "status": "failed",
-                    "error": str(e)
+                    "error": error_message
                 })
         
-        logger.info(f"Bulk rejection completed: {success_count}/{len(approval_ids)} successful")
+        logger.info(f"Bulk rejection completed: {success_count}/{len(errors)} successful")
         
         return {
-            "message": f"Bulk rejection completed: {success_count}/{len(approval_ids)} successful",
-            "total": len(approval_ids),
+            "message": f"Bulk rejection completed: {success_count}/{len(errors)} successful",
+            "total": len(errors),
             "successful": success_count,
-            "failed": len(approval_ids) - success_count,
+            "failed": len(errors) - success_count,
             "results": results
         }
         
@@ -5,14 +5,17 @@ Authentication API endpoints for the Expense Management System.
 import logging
 from typing import Optional
 
-from fastapi import APIRouter, HTTPException, Depends, Form, status
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends, Form, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from app.database import get_db
 from app.models import User
-from app.schemas import LoginRequest, Token, PasswordChange
-from app.auth import auth_manager, get_current_active_user, authenticate_user
+from app.schemas import LoginRequest, Token, PasswordChange, AuditAction
+from app.auth import (
+    auth_manager, get_current_active_user, authenticate_user,
+    last_login_is_stale, record_last_login, password_needs_rehash, rehash_password
+)
 from app.services.audit_service import audit_service
 
 logger = logging.getLogger(__name__)
@@ -23,6 +26,7 @@ router = APIRouter(prefix="/auth", tags=["Authentication"])
 @router.post("/login", response_model=Token)
 async def login(
     login_data: LoginRequest,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db)
 ):
     """Authenticate user and return JWT tokens."""
@@ -42,19 +46,21 @@ async def login(
             role=user.role.value
         )
         
-        # Update last login
-        from datetime import datetime
-        user.last_login = datetime.utcnow()
-        await db.commit()
+        # Update last login, at most once per LAST_LOGIN_RESOLUTION
+        if last_login_is_stale(user):
+            background_tasks.add_task(record_last_login, user.id)
+        
+        # Upgrade bcrypt hashes and outdated Argon2 parameters
+        if password_needs_rehash(user.password_hash):
+            background_tasks.add_task(rehash_password, user.id, login_data.password, user.password_hash)
         
         # Log audit trail
-        await audit_service.log_action(
-            company_id=str(user.company_id),
-            user_id=str(user.id),
-            action="login",
+        audit_service.enqueue(
+            company_id=user.company_id,
+            user_id=user.id,
+            action=AuditAction.login,
             resource_type="user",
-            resource_id=str(user.id),
-            db=db
+            resource_id=user.id
         )
         
         return tokens
@@ -77,18 +83,11 @@ async def refresh_token(
     """Refresh access token using refresh token."""
     try:
         # Verify refresh token
-        payload = auth_manager.verify_token(refresh_token, "refresh")
-        user_id = payload.get("sub")
-        
-        if not user_id:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid refresh token"
-            )
+        claims = auth_manager.verify_token(refresh_token, "refresh")
         
         # Get user
         result = await db.execute(
-            select(User).where(User.id == user_id, User.is_active == True)
+            select(User).where(User.id == claims.sub, User.is_active == True)
         )
         user = result.scalar_one_or_none()
         
@@ -126,26 +125,27 @@ async def change_password(
     """Change user password."""
     try:
         # Verify current password
-        if not auth_manager.verify_password(password_data.current_password, current_user.password_hash):
+        if not await auth_manager.verify_password(
+            password_data.current_password, current_user.password_hash
+        ):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Current password is incorrect"
             )
         
         # Update password
-        current_user.password_hash = auth_manager.get_password_hash(password_data.new_password)
+        current_user.password_hash = await auth_manager.get_password_hash(password_data.new_password)
         current_user.must_change_password = False
         
         await db.commit()
         
         # Log audit trail
-        await audit_service.log_action(
-            company_id=str(current_user.company_id),
-            user_id=str(current_user.id),
-            action="password_change",
+        audit_service.enqueue(
+            company_id=current_user.company_id,
+            user_id=current_user.id,
+            action=AuditAction.password_change,
             resource_type="user",
-            resource_id=str(current_user.id),
-            db=db
+            resource_id=current_user.id
         )
         
         return {"message": "Password changed successfully"}
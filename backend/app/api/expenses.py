@@ -2,23 +2,32 @@
 Expense API endpoints for the Expense Management System.
 """
 
+import hashlib
 import logging
-from typing import List, Optional
+from collections import defaultdict
+from typing import List, NoReturn, Optional
 from uuid import UUID
 
 from fastapi import APIRouter, HTTPException, Depends, Query, status
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, desc, func
-from sqlalchemy.orm import selectinload
-from datetime import datetime
+from sqlalchemy import Boolean, bindparam, select, update, delete, and_, or_, desc, func, tuple_
+from sqlalchemy.orm import joinedload, selectinload
+from datetime import date
 
+from config import settings
+from app.cache import cache_get_or_set
+from app.company_cache import get_base_currency
 from app.database import get_db
-from app.models import User, Expense, ExpenseCategory, Approval, Company
+from app.models import User, Expense, ExpenseCategory, Approval
 from app.schemas import (
     ExpenseCreate, ExpenseUpdate, Expense as ExpenseSchema, 
-    ExpenseWithDetails, PaginationParams, PaginatedResponse
+    ExpenseWithDetails, PaginationParams, PaginatedResponse, AuditAction,
+    ExpenseStatus, UserRole, User as UserSchema, ExpenseCategory as ExpenseCategorySchema,
+    Approval as ApprovalSchema, ApprovalWithDetails
 )
 from app.auth import get_current_active_user, require_admin, require_manager_or_admin
+from app.pagination import exact_count, next_cursor_for, parse_cursor_param
 from app.services.currency_service import currency_service
 from app.services.approval_service import approval_service
 from app.services.audit_service import audit_service
@@ -28,6 +37,40 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/expenses", tags=["Expenses"])
 
+# Hot-path statements built once with bind parameters so every request
+# reuses the same compiled SQL from SQLAlchemy's statement cache.
+_GET_EXPENSE_STMT = (
+    select(Expense)
+    .where(
+        Expense.id == bindparam("expense_id"),
+        Expense.company_id == bindparam("company_id"),
+        or_(
+            bindparam("unrestricted", type_=Boolean),
+            Expense.user_id == bindparam("user_id")
+        )
+    )
+    # Join the single-valued relationships; keep selectin for the approvals collection
+    .options(
+        joinedload(Expense.user),
+        joinedload(Expense.category),
+        selectinload(Expense.approvals).joinedload(Approval.approver)
+    )
+)
+
+_EXPENSE_ACCESS_STMT = select(Expense.user_id, Expense.status).where(
+    Expense.id == bindparam("expense_id"),
+    Expense.company_id == bindparam("company_id")
+)
+
+_EXPENSE_APPROVALS_STMT = (
+    select(Approval)
+    .where(Approval.expense_id == bindparam("expense_id"))
+    .options(selectinload(Approval.approver), selectinload(Approval.expense))
+    .order_by(Approval.created_at)
+)
+
+_APPROVAL_LIST = TypeAdapter(List[ApprovalWithDetails])
+
 
 @router.post("/", response_model=ExpenseSchema)
 async def create_expense(
@@ -38,18 +81,18 @@ async def create_expense(
     """Create a new expense."""
     try:
         # Get company base currency
-        company = await db.get(Company, current_user.company_id)
-        if not company:
+        base_currency = await get_base_currency(current_user.company_id, db)
+        if not base_currency:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Company not found"
             )
         
         # Convert amount to base currency if needed
-        amount_in_base = await currency_service.convert_currency(
+        exchange_rate, amount_in_base = await currency_service.get_rate_and_convert(
             amount=expense_data.amount,
             from_currency=expense_data.currency,
-            to_currency=company.base_currency,
+            to_currency=base_currency,
             rate_date=expense_data.expense_date,
             db=db
         )
@@ -57,17 +100,9 @@ async def create_expense(
         if amount_in_base is None:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Unable to convert {expense_data.currency} to {company.base_currency}"
+                detail=f"Unable to convert {expense_data.currency} to {base_currency}"
             )
         
-        # Get exchange rate
-        exchange_rate = await currency_service.get_exchange_rate(
-            from_currency=expense_data.currency,
-            to_currency=company.base_currency,
-            rate_date=expense_data.expense_date,
-            db=db
-        )
-        
         # Create expense
         expense = Expense(
             company_id=current_user.company_id,
@@ -86,20 +121,21 @@ async def create_expense(
         )
         
         db.add(expense)
-        await db.commit()
-        await db.refresh(expense)
+        await db.flush()
         
-        # Log audit trail
+        # Log audit trail in the same transaction
         await audit_service.log_action(
-            company_id=str(current_user.company_id),
-            user_id=str(current_user.id),
-            action="create",
+            company_id=current_user.company_id,
+            user_id=current_user.id,
+            action=AuditAction.create,
             resource_type="expense",
-            resource_id=str(expense.id),
-            new_values=expense_data.dict(),
+            resource_id=expense.id,
+            new_values=expense_data.model_dump(mode="json"),
             db=db
         )
         
+        await db.commit()
+        
         logger.info(f"Created expense {expense.id} for user {current_user.id}")
         return expense
         
@@ -114,6 +150,75 @@ async def create_expense(
         )
 
 
+# Column lists for the read-only listing, taken from the response schemas
+_EXPENSE_FIELDS = list(ExpenseSchema.model_fields)
+_USER_FIELDS = list(UserSchema.model_fields)
+_CATEGORY_FIELDS = list(ExpenseCategorySchema.model_fields)
+_APPROVAL_FIELDS = list(ApprovalSchema.model_fields)
+
+
+def _expense_list_query(conditions: list):
+    """Core select of expense rows with their user and category columns."""
+    return (
+        select(
+            *[getattr(Expense, name) for name in _EXPENSE_FIELDS],
+            *[getattr(User, name).label(f"user__{name}") for name in _USER_FIELDS],
+            *[getattr(ExpenseCategory, name).label(f"category__{name}") for name in _CATEGORY_FIELDS]
+        )
+        .select_from(Expense)
+        .join(User, Expense.user_id == User.id)
+        .outerjoin(ExpenseCategory, Expense.category_id == ExpenseCategory.id)
+        .where(*conditions)
+        .order_by(desc(Expense.created_at), desc(Expense.id))
+    )
+
+
+async def _build_expense_details(rows: list, db: AsyncSession) -> List[ExpenseWithDetails]:
+    """
+    Assemble ``ExpenseWithDetails`` from Core rows without ORM hydration.
+    
+    Approvals are fetched in one keyed query and grouped by expense.
+    
+    Args:
+        rows: Rows from ``_expense_list_query``
+        db: Database session
+        
+    Returns:
+        List[ExpenseWithDetails]: Expenses with user, category and approvals
+    """
+    approvals_by_expense = defaultdict(list)
+    
+    if rows:
+        result = await db.execute(
+            select(*[getattr(Approval, name) for name in _APPROVAL_FIELDS])
+            .where(Approval.expense_id.in_([row.id for row in rows]))
+        )
+        for approval in result:
+            approvals_by_expense[approval.expense_id].append(
+                ApprovalSchema.model_construct(**approval._mapping)
+            )
+    
+    items = []
+    for row in rows:
+        mapping = row._mapping
+        category = None
+        if mapping["category__id"] is not None:
+            category = ExpenseCategorySchema.model_construct(
+                **{name: mapping[f"category__{name}"] for name in _CATEGORY_FIELDS}
+            )
+        
+        items.append(ExpenseWithDetails.model_construct(
+            **{name: mapping[name] for name in _EXPENSE_FIELDS},
+            user=UserSchema.model_construct(
+                **{name: mapping[f"user__{name}"] for name in _USER_FIELDS}
+            ),
+            category=category,
+            approvals=approvals_by_expense[row.id]
+        ))
+    
+    return items
+
+
 @router.get("/", response_model=PaginatedResponse)
 async def get_expenses(
     current_user: User = Depends(get_current_active_user),
@@ -121,60 +226,80 @@ async def get_expenses(
     pagination: PaginationParams = Depends(),
     status_filter: Optional[str] = Query(None),
     category_id: Optional[UUID] = Query(None),
-    start_date: Optional[str] = Query(None),
-    end_date: Optional[str] = Query(None)
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    cursor: Optional[str] = Query(None)
 ):
     """Get expenses for the current user."""
     try:
-        # Build query
-        query = select(Expense).where(Expense.company_id == current_user.company_id)
+        cursor_key = parse_cursor_param(cursor)
+        
+        # Build filters
+        conditions = [Expense.company_id == current_user.company_id]
         
         # Apply user filter (employees can only see their own expenses)
         if current_user.role == "employee":
-            query = query.where(Expense.user_id == current_user.id)
+            conditions.append(Expense.user_id == current_user.id)
         
         # Apply filters
         if status_filter:
-            query = query.where(Expense.status == status_filter)
+            conditions.append(Expense.status == status_filter)
         
         if category_id:
-            query = query.where(Expense.category_id == category_id)
+            conditions.append(Expense.category_id == category_id)
         
         if start_date:
-            query = query.where(Expense.expense_date >= start_date)
+            conditions.append(Expense.expense_date >= start_date)
         
         if end_date:
-            query = query.where(Expense.expense_date <= end_date)
+            conditions.append(Expense.expense_date <= end_date)
         
-        # Get total count
-        count_query = select(func.count(Expense.id))
-        for filter_condition in query.whereclause:
-            count_query = count_query.where(filter_condition)
+        query = _expense_list_query(conditions)
         
-        count_result = await db.execute(count_query)
-        total_count = count_result.scalar()
+        # Keyset pagination: seek past the last-seen (created_at, id)
+        if cursor_key:
+            result = await db.execute(
+                query.where(tuple_(Expense.created_at, Expense.id) < tuple_(*cursor_key))
+                .limit(pagination.size + 1)
+            )
+            rows, next_cursor = next_cursor_for(result.all(), pagination.size, "created_at")
+            
+            return PaginatedResponse(
+                items=await _build_expense_details(rows, db),
+                size=pagination.size,
+                next_cursor=next_cursor
+            )
         
-        # Get paginated results
-        query = query.options(
-            selectinload(Expense.user),
-            selectinload(Expense.category),
-            selectinload(Expense.approvals)
-        ).order_by(desc(Expense.created_at))
+        # Deprecated page/offset path; the total is cached briefly across pages
+        async def count() -> int:
+            return await exact_count(db, select(Expense.id).where(*conditions))
+        
+        count_key = hashlib.blake2b(
+            f"{status_filter}:{category_id}:{start_date}:{end_date}".encode(), digest_size=8
+        ).hexdigest()
+        total_count = await cache_get_or_set(
+            f"count:expenses:{current_user.id}:{count_key}",
+            ttl=settings.count_cache_ttl,
+            loader=count
+        )
         
         result = await db.execute(
             query.offset((pagination.page - 1) * pagination.size)
-            .limit(pagination.size)
+            .limit(pagination.size + 1)
         )
-        expenses = result.scalars().all()
+        rows, next_cursor = next_cursor_for(result.all(), pagination.size, "created_at")
         
         return PaginatedResponse(
-            items=[ExpenseWithDetails.from_orm(expense) for expense in expenses],
+            items=await _build_expense_details(rows, db),
             total=total_count,
             page=pagination.page,
             size=pagination.size,
-            pages=(total_count + pagination.size - 1) // pagination.size
+            pages=(total_count + pagination.size - 1) // pagination.size,
+            next_cursor=next_cursor
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting expenses: {e}")
         raise HTTPException(
@@ -191,26 +316,16 @@ async def get_expense(
 ):
     """Get a specific expense by ID."""
     try:
-        # Build query
-        query = select(Expense).where(
-            and_(
-                Expense.id == expense_id,
-                Expense.company_id == current_user.company_id
-            )
-        )
-        
-        # Apply user filter for employees
-        if current_user.role == "employee":
-            query = query.where(Expense.user_id == current_user.id)
-        
-        query = query.options(
-            selectinload(Expense.user),
-            selectinload(Expense.category),
-            selectinload(Expense.approvals).selectinload(Approval.approver)
+        result = await db.execute(
+            _GET_EXPENSE_STMT,
+            {
+                "expense_id": expense_id,
+                "company_id": current_user.company_id,
+                "user_id": current_user.id,
+                "unrestricted": current_user.role != UserRole.employee
+            }
         )
-        
-        result = await db.execute(query)
-        expense = result.scalar_one_or_none()
+        expense = result.unique().scalar_one_or_none()
         
         if not expense:
             raise HTTPException(
@@ -218,7 +333,7 @@ async def get_expense(
                 detail="Expense not found"
             )
         
-        return ExpenseWithDetails.from_orm(expense)
+        return ExpenseWithDetails.model_validate(expense)
         
     except HTTPException:
         raise
@@ -230,6 +345,60 @@ async def get_expense(
         )
 
 
+def _editable_expense_filter(expense_id: UUID, current_user: User):
+    """Predicate for a draft expense the current user is allowed to modify."""
+    return and_(
+        Expense.id == expense_id,
+        Expense.company_id == current_user.company_id,
+        Expense.status == ExpenseStatus.draft,
+        or_(current_user.role != UserRole.employee, Expense.user_id == current_user.id)
+    )
+
+
+async def _raise_unmodifiable(
+    expense_id: UUID,
+    current_user: User,
+    db: AsyncSession,
+    status_detail: str
+) -> NoReturn:
+    """
+    Explain why a guarded UPDATE/DELETE matched no row.
+    
+    Only runs on the failure path, so successful mutations stay at one statement.
+    
+    Args:
+        expense_id: ID of the expense
+        current_user: User attempting the change
+        db: Database session
+        status_detail: Error message when the expense is no longer a draft
+        
+    Raises:
+        HTTPException: 404, 403 or 400 depending on the cause
+    """
+    result = await db.execute(
+        _EXPENSE_ACCESS_STMT,
+        {"expense_id": expense_id, "company_id": current_user.company_id}
+    )
+    row = result.one_or_none()
+    
+    if not row:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Expense not found"
+        )
+    
+    if current_user.role == UserRole.employee and row.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=status_detail
+    )
+
+
 @router.put("/{expense_id}", response_model=ExpenseSchema)
 async def update_expense(
     expense_id: UUID,
@@ -239,81 +408,93 @@ async def update_expense(
 ):
     """Update an expense."""
     try:
-        # Get expense
-        result = await db.execute(
-            select(Expense).where(
-                and_(
-                    Expense.id == expense_id,
-                    Expense.company_id == current_user.company_id
+        values = expense_data.model_dump(exclude_unset=True)
+        editable = _editable_expense_filter(expense_id, current_user)
+        
+        # Nothing to change: return the expense without a write or audit entry
+        if not values:
+            result = await db.execute(select(Expense).where(editable))
+            expense = result.scalar_one_or_none()
+            
+            if not expense:
+                await _raise_unmodifiable(
+                    expense_id, current_user, db, "Expense cannot be updated after submission"
                 )
-            )
-        )
-        expense = result.scalar_one_or_none()
+            
+            return expense
         
-        if not expense:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Expense not found"
+        # Recalculate base currency amount if amount or currency changed
+        if "amount" in values or "currency" in values:
+            result = await db.execute(
+                select(Expense.amount, Expense.currency, Expense.expense_date).where(editable)
+            )
+            current = result.one_or_none()
+            
+            if current:
+                base_currency = await get_base_currency(current_user.company_id, db)
+                exchange_rate, amount_in_base = await currency_service.get_rate_and_convert(
+                    amount=values.get("amount", current.amount),
+                    from_currency=values.get("currency", current.currency),
+                    to_currency=base_currency,
+                    rate_date=values.get("expense_date", current.expense_date),
+                    db=db
+                )
+                
+                if amount_in_base:
+                    values["amount_in_base_currency"] = amount_in_base
+                    values["exchange_rate"] = exchange_rate
+        
+        # Authorize, snapshot old values and update in one statement
+        old = (
+            select(
+                Expense.id, Expense.description, Expense.amount, Expense.currency,
+                Expense.expense_date, Expense.paid_by, Expense.remarks
             )
+            .where(editable)
+            .cte("old")
+        )
         
-        # Check permissions
-        if current_user.role == "employee" and expense.user_id != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Access denied"
+        result = await db.execute(
+            update(Expense)
+            .where(Expense.id == old.c.id)
+            .values(**values)
+            .returning(
+                Expense, old.c.description, old.c.amount, old.c.currency,
+                old.c.expense_date, old.c.paid_by, old.c.remarks
             )
+            .execution_options(synchronize_session=False)
+        )
+        row = result.one_or_none()
         
-        # Check if expense can be updated
-        if expense.status not in ["draft"]:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Expense cannot be updated after submission"
+        if not row:
+            await _raise_unmodifiable(
+                expense_id, current_user, db, "Expense cannot be updated after submission"
             )
         
-        # Store old values for audit
+        expense = row[0]
         old_values = {
-            "description": expense.description,
-            "amount": float(expense.amount),
-            "currency": expense.currency,
-            "expense_date": expense.expense_date.isoformat(),
-            "paid_by": expense.paid_by,
-            "remarks": expense.remarks
+            "description": row.description,
+            "amount": float(row.amount),
+            "currency": row.currency,
+            "expense_date": row.expense_date.isoformat(),
+            "paid_by": row.paid_by,
+            "remarks": row.remarks
         }
         
-        # Update fields
-        update_data = expense_data.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(expense, field, value)
-        
-        # Recalculate base currency amount if amount or currency changed
-        if "amount" in update_data or "currency" in update_data:
-            company = await db.get(Company, current_user.company_id)
-            amount_in_base = await currency_service.convert_currency(
-                amount=expense.amount,
-                from_currency=expense.currency,
-                to_currency=company.base_currency,
-                rate_date=expense.expense_date,
-                db=db
-            )
-            
-            if amount_in_base:
-                expense.amount_in_base_currency = amount_in_base
-        
-        await db.commit()
-        await db.refresh(expense)
-        
-        # Log audit trail
+        # Log audit trail in the same transaction
         await audit_service.log_action(
-            company_id=str(current_user.company_id),
-            user_id=str(current_user.id),
-            action="update",
+            company_id=current_user.company_id,
+            user_id=current_user.id,
+            action=AuditAction.update,
             resource_type="expense",
-            resource_id=str(expense.id),
+            resource_id=expense.id,
             old_values=old_values,
-            new_values=update_data,
+            new_values=expense_data.model_dump(mode="json", exclude_unset=True),
             db=db
         )
         
+        await db.commit()
+        
         logger.info(f"Updated expense {expense.id}")
         return expense
         
@@ -336,51 +517,59 @@ async def submit_expense(
 ):
     """Submit an expense for approval."""
     try:
-        # Get expense
+        # Only the owner can submit their own draft
         result = await db.execute(
-            select(Expense).where(
+            update(Expense)
+            .where(
                 and_(
                     Expense.id == expense_id,
                     Expense.company_id == current_user.company_id,
-                    Expense.user_id == current_user.id
+                    Expense.user_id == current_user.id,
+                    Expense.status == ExpenseStatus.draft
                 )
             )
+            .values(status=ExpenseStatus.pending, submitted_at=func.now())
+            .returning(Expense)
+            .execution_options(synchronize_session=False)
         )
         expense = result.scalar_one_or_none()
         
         if not expense:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Expense not found"
+            exists = await db.execute(
+                select(Expense.id).where(
+                    and_(
+                        Expense.id == expense_id,
+                        Expense.company_id == current_user.company_id,
+                        Expense.user_id == current_user.id
+                    )
+                )
             )
-        
-        if expense.status != "draft":
+            if exists.scalar_one_or_none() is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Expense not found"
+                )
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Expense is not in draft status"
             )
         
-        # Update expense status
-        expense.status = "pending"
-        expense.submitted_at = datetime.utcnow()
-        
-        await db.commit()
-        
-        # Create approval workflow
+        # Create approval workflow and audit entry in the same transaction
         await approval_service.create_approval_workflow(expense, db)
         
-        # Log audit trail
         await audit_service.log_action(
-            company_id=str(current_user.company_id),
-            user_id=str(current_user.id),
-            action="update",
+            company_id=current_user.company_id,
+            user_id=current_user.id,
+            action=AuditAction.update,
             resource_type="expense",
-            resource_id=str(expense.id),
+            resource_id=expense.id,
             old_values={"status": "draft"},
             new_values={"status": "pending", "submitted_at": expense.submitted_at.isoformat()},
             db=db
         )
         
+        await db.commit()
+        
         logger.info(f"Submitted expense {expense.id} for approval")
         return {"message": "Expense submitted for approval", "expense_id": str(expense.id)}
         
@@ -403,60 +592,39 @@ async def delete_expense(
 ):
     """Delete an expense."""
     try:
-        # Get expense
+        # Authorize and delete in one statement, returning the data for audit
         result = await db.execute(
-            select(Expense).where(
-                and_(
-                    Expense.id == expense_id,
-                    Expense.company_id == current_user.company_id
-                )
-            )
+            delete(Expense)
+            .where(_editable_expense_filter(expense_id, current_user))
+            .returning(Expense.description, Expense.amount, Expense.currency, Expense.status)
+            .execution_options(synchronize_session=False)
         )
-        expense = result.scalar_one_or_none()
-        
-        if not expense:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Expense not found"
-            )
-        
-        # Check permissions
-        if current_user.role == "employee" and expense.user_id != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Access denied"
-            )
+        row = result.one_or_none()
         
-        # Check if expense can be deleted
-        if expense.status not in ["draft"]:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Expense cannot be deleted after submission"
+        if not row:
+            await _raise_unmodifiable(
+                expense_id, current_user, db, "Expense cannot be deleted after submission"
             )
         
-        # Store expense data for audit
         expense_data = {
-            "description": expense.description,
-            "amount": float(expense.amount),
-            "currency": expense.currency,
-            "status": expense.status
+            "description": row.description,
+            "amount": float(row.amount),
+            "currency": row.currency,
+            "status": row.status.value
         }
         
-        # Delete expense
-        await db.delete(expense)
-        await db.commit()
-        
-        # Log audit trail
         await audit_service.log_action(
-            company_id=str(current_user.company_id),
-            user_id=str(current_user.id),
-            action="delete",
+            company_id=current_user.company_id,
+            user_id=current_user.id,
+            action=AuditAction.delete,
             resource_type="expense",
-            resource_id=str(expense_id),
+            resource_id=expense_id,
             old_values=expense_data,
             db=db
         )
         
+        await db.commit()
+        
         logger.info(f"Deleted expense {expense_id}")
         return {"message": "Expense deleted successfully"}
         
@@ -481,14 +649,10 @@ async def get_expense_approvals(
     try:
         # Check if user has access to this expense
         result = await db.execute(
-            select(Expense).where(
-                and_(
-                    Expense.id == expense_id,
-                    Expense.company_id == current_user.company_id
-                )
-            )
+            _EXPENSE_ACCESS_STMT,
+            {"expense_id": expense_id, "company_id": current_user.company_id}
         )
-        expense = result.scalar_one_or_none()
+        expense = result.one_or_none()
         
         if not expense:
             raise HTTPException(
@@ -504,15 +668,10 @@ async def get_expense_approvals(
             )
         
         # Get approvals
-        result = await db.execute(
-            select(Approval)
-            .where(Approval.expense_id == expense_id)
-            .options(selectinload(Approval.approver))
-            .order_by(Approval.created_at)
-        )
+        result = await db.execute(_EXPENSE_APPROVALS_STMT, {"expense_id": expense_id})
         approvals = result.scalars().all()
         
-        return [ApprovalWithDetails.from_orm(approval) for approval in approvals]
+        return _APPROVAL_LIST.validate_python(approvals, from_attributes=True)
         
     except HTTPException:
         raise
@@ -2,11 +2,14 @@
 Notification API endpoints for the Expense Management System.
 """
 
+import asyncio
 import logging
 from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Depends, Query, status
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, status
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
@@ -16,12 +19,20 @@ from app.schemas import (
     PaginationParams, PaginatedResponse, NotificationType
 )
 from app.auth import get_current_active_user
+from app.pagination import parse_cursor_param
 from app.services.notification_service import notification_service
+from app.services.notification_stream import notification_stream
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/notifications", tags=["Notifications"])
 
+# Converts a page of ORM notifications in one pass instead of one model_validate call per row
+_NOTIFICATION_LIST = TypeAdapter(List[NotificationSchema])
+
+# Seconds between SSE comment frames that keep idle proxies from closing the stream
+SSE_KEEPALIVE_SECONDS = 15
+
 
 @router.get("/", response_model=PaginatedResponse)
 async def get_notifications(
@@ -29,35 +40,50 @@ async def get_notifications(
     db: AsyncSession = Depends(get_db),
     pagination: PaginationParams = Depends(),
     unread_only: bool = Query(False),
-    notification_type: Optional[NotificationType] = Query(None)
+    notification_type: Optional[NotificationType] = Query(None),
+    cursor: Optional[str] = Query(None)
 ):
     """Get notifications for the current user."""
     try:
+        cursor_key = parse_cursor_param(cursor)
+        
         if notification_type:
-            notifications, total_count = await notification_service.get_notifications_by_type(
-                user_id=str(current_user.id),
+            notifications, total_count, next_cursor = await notification_service.get_notifications_by_type(
+                user_id=current_user.id,
                 notification_type=notification_type,
                 db=db,
                 limit=pagination.size,
-                offset=(pagination.page - 1) * pagination.size
+                offset=(pagination.page - 1) * pagination.size,
+                cursor=cursor_key
             )
         else:
-            notifications, total_count = await notification_service.get_user_notifications(
-                user_id=str(current_user.id),
+            notifications, total_count, next_cursor = await notification_service.get_user_notifications(
+                user_id=current_user.id,
                 db=db,
                 unread_only=unread_only,
                 limit=pagination.size,
-                offset=(pagination.page - 1) * pagination.size
+                offset=(pagination.page - 1) * pagination.size,
+                cursor=cursor_key
+            )
+        
+        if cursor_key:
+            return PaginatedResponse(
+                items=_NOTIFICATION_LIST.validate_python(notifications, from_attributes=True),
+                size=pagination.size,
+                next_cursor=next_cursor
             )
         
         return PaginatedResponse(
-            items=[NotificationSchema.from_orm(notification) for notification in notifications],
+            items=_NOTIFICATION_LIST.validate_python(notifications, from_attributes=True),
             total=total_count,
             page=pagination.page,
             size=pagination.size,
-            pages=(total_count + pagination.size - 1) // pagination.size
+            pages=(total_count + pagination.size - 1) // pagination.size,
+            next_cursor=next_cursor
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting notifications: {e}")
         raise HTTPException(
@@ -66,6 +92,37 @@ async def get_notifications(
         )
 
 
+@router.get("/stream")
+async def stream_notifications(
+    request: Request,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Stream new notifications for the current user as server-sent events."""
+    # Release the request's pooled connection; the stream can stay open for hours
+    await db.close()
+    
+    queue = await notification_stream.subscribe(current_user.id)
+    
+    async def events():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    payload = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: notification\ndata: {payload}\n\n"
+        finally:
+            await notification_stream.unsubscribe(current_user.id, queue)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/{notification_id}", response_model=NotificationSchema)
 async def get_notification(
     notification_id: UUID,
@@ -75,8 +132,8 @@ async def get_notification(
     """Get a specific notification by ID."""
     try:
         notification = await notification_service.get_notification_by_id(
-            notification_id=str(notification_id),
-            user_id=str(current_user.id),
+            notification_id=notification_id,
+            user_id=current_user.id,
             db=db
         )
         
@@ -86,7 +143,7 @@ async def get_notification(
                 detail="Notification not found"
             )
         
-        return NotificationSchema.from_orm(notification)
+        return NotificationSchema.model_validate(notification)
         
     except HTTPException:
         raise
@@ -107,27 +164,20 @@ async def update_notification(
 ):
     """Update a notification."""
     try:
-        success = await notification_service.update_notification(
-            notification_id=str(notification_id),
-            user_id=str(current_user.id),
-            update_data=notification_data.dict(exclude_unset=True),
+        notification = await notification_service.update_notification(
+            notification_id=notification_id,
+            user_id=current_user.id,
+            update_data=notification_data.model_dump(exclude_unset=True),
             db=db
         )
         
-        if not success:
+        if not notification:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Notification not found or access denied"
             )
         
-        # Get updated notification
-        notification = await notification_service.get_notification_by_id(
-            notification_id=str(notification_id),
-            user_id=str(current_user.id),
-            db=db
-        )
-        
-        return NotificationSchema.from_orm(notification)
+        return NotificationSchema.model_validate(notification)
         
     except HTTPException:
         raise
@@ -148,8 +198,8 @@ async def mark_notification_read(
     """Mark a notification as read."""
     try:
         success = await notification_service.mark_notification_read(
-            notification_id=str(notification_id),
-            user_id=str(current_user.id),
+            notification_id=notification_id,
+            user_id=current_user.id,
             db=db
         )
         
@@ -179,7 +229,7 @@ async def mark_all_notifications_read(
     """Mark all notifications as read for the current user."""
     try:
         updated_count = await notification_service.mark_all_notifications_read(
-            user_id=str(current_user.id),
+            user_id=current_user.id,
             db=db
         )
         
@@ -205,7 +255,7 @@ async def mark_notifications_by_type_read(
     """Mark all notifications of a specific type as read."""
     try:
         updated_count = await notification_service.mark_notifications_by_type_read(
-            user_id=str(current_user.id),
+            user_id=current_user.id,
             notification_type=notification_type,
             db=db
         )
@@ -233,8 +283,8 @@ async def delete_notification(
     """Delete a notification."""
     try:
         success = await notification_service.delete_notification(
-            notification_id=str(notification_id),
-            user_id=str(current_user.id),
+            notification_id=notification_id,
+            user_id=current_user.id,
             db=db
         )
         
@@ -264,7 +314,7 @@ async def get_unread_count(
     """Get count of unread notifications for the current user."""
     try:
         unread_count = await notification_service.get_unread_count(
-            user_id=str(current_user.id),
+            user_id=current_user.id,
             db=db
         )
         
@@ -291,14 +341,14 @@ async def get_recent_notifications(
     """Get recent notifications for the current user."""
     try:
         notifications = await notification_service.get_recent_notifications(
-            user_id=str(current_user.id),
+            user_id=current_user.id,
             db=db,
             hours=hours,
             limit=limit
         )
         
         return {
-            "notifications": [NotificationSchema.from_orm(n) for n in notifications],
+            "notifications": _NOTIFICATION_LIST.validate_python(notifications, from_attributes=True),
             "count": len(notifications),
             "hours": hours,
             "user_id": str(current_user.id)
@@ -320,7 +370,7 @@ async def get_notification_statistics(
     """Get notification statistics for the current user."""
     try:
         stats = await notification_service.get_notification_statistics(
-            user_id=str(current_user.id),
+            user_id=current_user.id,
             db=db
         )
         
@@ -3,29 +3,151 @@ Authentication and authorization utilities for the Expense Management System.
 Handles JWT tokens, password hashing, and role-based access control.
 """
 
+import asyncio
+import hashlib
+import hmac
+import os
 import secrets
 import string
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, Iterable
+from uuid import UUID
 
-from jose import JWTError, jwt
-from passlib.context import CryptContext
-from fastapi import HTTPException, status, Depends
+import bcrypt
+import jwt
+import orjson
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+from cachetools import TLRUCache, TTLCache
+from fastapi import HTTPException, Request, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import bindparam, lambda_stmt, select, update, or_, func
+from sqlalchemy.orm import contains_eager
 
 from config import settings
-from app.database import get_db
+from app.database import get_db, AsyncSessionLocal
 from app.models import User, Company
 from app.schemas import UserRole
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Both hashers release the GIL, so one worker per core lets logins hash in parallel
+_HASH_POOL = ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix="password-hash")
+
+_PASSWORD_HASHER = PasswordHasher(
+    time_cost=settings.argon2_time_cost,
+    memory_cost=settings.argon2_memory_cost,
+    parallelism=settings.argon2_parallelism,
+)
+
+# Prefixes of legacy bcrypt hashes (including those written by passlib)
+_BCRYPT_PREFIXES = ("$2a$", "$2b$", "$2y$")
+
+
+def _check_password(plain_password: str, hashed_password: str) -> bool:
+    """Blocking check against an Argon2id hash or a legacy bcrypt hash."""
+    try:
+        if hashed_password.startswith(_BCRYPT_PREFIXES):
+            return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
+        return _PASSWORD_HASHER.verify(hashed_password, plain_password)
+    except (ValueError, VerificationError, InvalidHashError):
+        # Wrong password, or a malformed hash
+        return False
+
+
+def _hash_password(password: str) -> str:
+    """Blocking Argon2id hash of a password."""
+    return _PASSWORD_HASHER.hash(password)
+
+
+# Characters for generated passwords; bytes at or above the threshold are
+# rejected so that ``byte % len(alphabet)`` is uniform
+_PASSWORD_ALPHABET = (string.ascii_letters + string.digits + "!@#$%^&*").encode()
+_PASSWORD_THRESHOLD = (256 // len(_PASSWORD_ALPHABET)) * len(_PASSWORD_ALPHABET)
+
+# Hash verified for unknown emails so that login timing does not reveal which accounts exist
+_DUMMY_PASSWORD_HASH = _hash_password(secrets.token_urlsafe(16))
 
 # JWT token security
 security = HTTPBearer()
 
+# last_login is only rewritten when older than this
+LAST_LOGIN_RESOLUTION = timedelta(minutes=5)
+
+# Upper bound, in seconds, on how long a verified token payload is reused
+TOKEN_CACHE_TTL = 60
+
+# Seconds a token that failed verification is remembered and rejected outright
+REJECTED_TOKEN_TTL = 300
+
+# Seconds a failed (email, password) pair is rejected without hashing it again
+FAILED_LOGIN_TTL = 10
+
+# Failed login attempts, keyed by a digest that cannot be reversed outside this process
+_failed_logins = TTLCache(maxsize=50_000, ttl=FAILED_LOGIN_TTL)
+_FAILED_LOGIN_KEY = secrets.token_bytes(32)
+
+# Auth lookups run on every request; built once as lambda statements so their
+# compiled form is cached.
+_USER_WITH_COMPANY_STMT = lambda_stmt(
+    lambda: select(User)
+    .join(User.company)
+    .where(User.id == bindparam("user_id"), User.is_active == True)
+    .options(contains_eager(User.company))
+)
+
+_COMPANY_BY_ID_STMT = lambda_stmt(
+    lambda: select(Company).where(Company.id == bindparam("company_id"))
+)
+
+_ACTIVE_USER_BY_EMAIL_STMT = lambda_stmt(
+    lambda: select(User).where(func.lower(User.email) == bindparam("email"), User.is_active == True)
+)
+
+
+@dataclass(frozen=True, slots=True)
+class TokenClaims:
+    """Verified JWT claims with identifiers already parsed."""
+    sub: UUID
+    company_id: UUID
+    role: UserRole
+    type: str
+    exp: int
+    
+    @classmethod
+    def from_payload(cls, payload: Dict[str, Any]) -> "TokenClaims":
+        """
+        Build claims from a decoded token payload.
+        
+        Raises:
+            KeyError, TypeError, ValueError: If a claim is missing or malformed
+        """
+        return cls(
+            sub=UUID(payload["sub"]),
+            company_id=UUID(payload["company_id"]),
+            role=UserRole(payload["role"]),
+            type=payload["type"],
+            exp=payload["exp"],
+        )
+
+
+class _OrjsonJWT(jwt.PyJWT):
+    """PyJWT decoder that parses the claims segment with orjson."""
+    
+    def _decode_payload(self, decoded: Dict[str, Any]) -> Any:
+        try:
+            payload = orjson.loads(decoded["payload"])
+        except orjson.JSONDecodeError as e:
+            raise jwt.DecodeError(f"Invalid payload string: {e}")
+        if not isinstance(payload, dict):
+            raise jwt.DecodeError("Invalid payload string: must be a json object")
+        return payload
+
+
+_jwt = _OrjsonJWT()
+
 
 class AuthManager:
     """Authentication manager for handling user authentication and authorization."""
@@ -33,12 +155,26 @@ class AuthManager:
     def __init__(self):
         self.secret_key = settings.secret_key
         self.algorithm = settings.algorithm
+        # Built once instead of on every encode/decode
+        self._encode_headers = {"alg": self.algorithm, "typ": "JWT"}
+        self._decode_kwargs = {
+            "key": self.secret_key,
+            "algorithms": [self.algorithm],
+            "options": {"require": ["exp", "type", "sub"]}
+        }
+        self._token_cache = TLRUCache(
+            maxsize=10_000,
+            ttu=lambda _key, claims, now: min(now + TOKEN_CACHE_TTL, claims.exp),
+            timer=time.time
+        )
+        # Digests of tokens that failed verification; an invalid token never becomes valid
+        self._rejected_tokens = TTLCache(maxsize=100_000, ttl=REJECTED_TOKEN_TTL)
         self.access_token_expire_minutes = settings.access_token_expire_minutes
         self.refresh_token_expire_days = settings.refresh_token_expire_days
     
-    def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """
-        Verify a plain password against its hash.
+        Verify a plain password against its hash on the password hashing thread pool.
         
         Args:
             plain_password: The plain text password
@@ -47,11 +183,13 @@ class AuthManager:
         Returns:
             bool: True if password matches, False otherwise
         """
-        return pwd_context.verify(plain_password, hashed_password)
+        return await asyncio.get_running_loop().run_in_executor(
+            _HASH_POOL, _check_password, plain_password, hashed_password
+        )
     
-    def get_password_hash(self, password: str) -> str:
+    async def get_password_hash(self, password: str) -> str:
         """
-        Hash a password.
+        Hash a password on the password hashing thread pool.
         
         Args:
             password: The plain text password
@@ -59,7 +197,9 @@ class AuthManager:
         Returns:
             str: The hashed password
         """
-        return pwd_context.hash(password)
+        return await asyncio.get_running_loop().run_in_executor(
+            _HASH_POOL, _hash_password, password
+        )
     
     def generate_random_password(self, length: int = 12) -> str:
         """
@@ -71,8 +211,15 @@ class AuthManager:
         Returns:
             str: Random password
         """
-        characters = string.ascii_letters + string.digits + "!@#$%^&*"
-        return ''.join(secrets.choice(characters) for _ in range(length))
+        chars = bytearray()
+        while len(chars) < length:
+            # One CSPRNG draw per round; rejection sampling keeps the mapping uniform
+            for byte in secrets.token_bytes(length * 2):
+                if byte < _PASSWORD_THRESHOLD:
+                    chars.append(_PASSWORD_ALPHABET[byte % len(_PASSWORD_ALPHABET)])
+                    if len(chars) == length:
+                        break
+        return chars.decode()
     
     def create_access_token(self, data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
         """
@@ -86,14 +233,11 @@ class AuthManager:
             str: JWT access token
         """
         to_encode = data.copy()
-        if expires_delta:
-            expire = datetime.utcnow() + expires_delta
-        else:
-            expire = datetime.utcnow() + timedelta(minutes=self.access_token_expire_minutes)
+        if expires_delta is None:
+            expires_delta = timedelta(minutes=self.access_token_expire_minutes)
         
-        to_encode.update({"exp": expire, "type": "access"})
-        encoded_jwt = jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
-        return encoded_jwt
+        to_encode.update({"exp": int(time.time() + expires_delta.total_seconds()), "type": "access"})
+        return self._encode(to_encode)
     
     def create_refresh_token(self, data: Dict[str, Any]) -> str:
         """
@@ -106,12 +250,17 @@ class AuthManager:
             str: JWT refresh token
         """
         to_encode = data.copy()
-        expire = datetime.utcnow() + timedelta(days=self.refresh_token_expire_days)
+        expire = int(time.time() + timedelta(days=self.refresh_token_expire_days).total_seconds())
         to_encode.update({"exp": expire, "type": "refresh"})
-        encoded_jwt = jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
-        return encoded_jwt
+        return self._encode(to_encode)
+    
+    def _encode(self, claims: Dict[str, Any]) -> str:
+        """Sign claims whose values are already JSON-native (exp as a Unix timestamp)."""
+        return jwt.api_jws.encode(
+            orjson.dumps(claims), self.secret_key, algorithm=self.algorithm, headers=self._encode_headers
+        )
     
-    def verify_token(self, token: str, token_type: str = "access") -> Dict[str, Any]:
+    def verify_token(self, token: str, token_type: str = "access") -> TokenClaims:
         """
         Verify and decode a JWT token.
         
@@ -120,26 +269,41 @@ class AuthManager:
             token_type: Type of token (access or refresh)
             
         Returns:
-            Dict[str, Any]: Decoded token data
+            TokenClaims: Decoded token claims
             
         Raises:
             HTTPException: If token is invalid or expired
         """
-        try:
-            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
-            if payload.get("type") != token_type:
+        # Verified claims are memoized until expiry (at most TOKEN_CACHE_TTL)
+        cache_key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+        claims = self._token_cache.get(cache_key)
+        
+        if claims is None:
+            # Tokens that already failed are rejected without redoing the crypto
+            if cache_key in self._rejected_tokens:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Could not validate credentials",
+                    headers={"WWW-Authenticate": "Bearer"},
+                )
+            try:
+                claims = TokenClaims.from_payload(_jwt.decode(token, **self._decode_kwargs))
+            except (jwt.PyJWTError, KeyError, TypeError, ValueError):
+                self._rejected_tokens[cache_key] = True
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Invalid token type",
+                    detail="Could not validate credentials",
                     headers={"WWW-Authenticate": "Bearer"},
                 )
-            return payload
-        except JWTError:
+            self._token_cache[cache_key] = claims
+        
+        if not hmac.compare_digest(claims.type, token_type):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Could not validate credentials",
+                detail="Invalid token type",
                 headers={"WWW-Authenticate": "Bearer"},
             )
+        return claims
     
     def create_token_pair(self, user_id: str, company_id: str, role: str) -> Dict[str, str]:
         """
@@ -175,13 +339,19 @@ auth_manager = AuthManager()
 
 
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db)
 ) -> User:
     """
     Get the current authenticated user.
     
+    The result is memoized on ``request.state.current_user``; the user's
+    company is loaded in the same query and kept on
+    ``request.state.current_company`` for get_current_company.
+    
     Args:
+        request: Incoming request
         credentials: HTTP authorization credentials
         db: Database session
         
@@ -191,29 +361,26 @@ async def get_current_user(
     Raises:
         HTTPException: If user is not authenticated or not found
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+    # Already resolved for this request (e.g. by a dependency with use_cache=False)
+    cached_user = getattr(request.state, "current_user", None)
+    if cached_user is not None:
+        return cached_user
     
-    try:
-        payload = auth_manager.verify_token(credentials.credentials)
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    
-    # Get user from database
-    result = await db.execute(
-        select(User).where(User.id == user_id, User.is_active == True)
-    )
+    claims = auth_manager.verify_token(credentials.credentials)
+    
+    # Get user and company from database in one round-trip
+    result = await db.execute(_USER_WITH_COMPANY_STMT, {"user_id": claims.sub})
     user = result.scalar_one_or_none()
     
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     
+    request.state.current_user = user
+    request.state.current_company = user.company
     return user
 
 
@@ -238,7 +405,10 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
     return current_user
 
 
-def require_role(allowed_roles: list[UserRole]):
+_MANAGER_OR_ADMIN = frozenset({UserRole.manager, UserRole.admin})
+
+
+def require_role(allowed_roles: Iterable[UserRole]):
     """
     Decorator to require specific user roles.
     
@@ -248,8 +418,10 @@ def require_role(allowed_roles: list[UserRole]):
     Returns:
         Decorator function
     """
+    allowed = frozenset(allowed_roles)
+    
     def role_checker(current_user: User = Depends(get_current_active_user)) -> User:
-        if current_user.role not in allowed_roles:
+        if current_user.role not in allowed:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Not enough permissions"
@@ -292,7 +464,7 @@ def require_manager_or_admin(current_user: User = Depends(get_current_active_use
     Raises:
         HTTPException: If user is not manager or admin
     """
-    if current_user.role not in [UserRole.manager, UserRole.admin]:
+    if current_user.role not in _MANAGER_OR_ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Manager or admin access required"
@@ -301,13 +473,17 @@ def require_manager_or_admin(current_user: User = Depends(get_current_active_use
 
 
 async def get_current_company(
+    request: Request,
     current_user: User = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db)
 ) -> Company:
     """
     Get the current user's company.
     
+    Reuses the company loaded alongside the user by get_current_user.
+    
     Args:
+        request: Incoming request
         current_user: Current authenticated user
         db: Database session
         
@@ -317,12 +493,12 @@ async def get_current_company(
     Raises:
         HTTPException: If company is not found
     """
-    result = await db.execute(
-        select(Company).where(Company.id == current_user.company_id, Company.is_active == True)
-    )
-    company = result.scalar_one_or_none()
-    
+    company = getattr(request.state, "current_company", None)
     if company is None:
+        result = await db.execute(_COMPANY_BY_ID_STMT, {"company_id": current_user.company_id})
+        company = result.scalar_one_or_none()
+    
+    if company is None or not company.is_active:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Company not found"
@@ -376,16 +552,106 @@ async def authenticate_user(email: str, password: str, db: AsyncSession) -> Opti
     Returns:
         Optional[User]: User if authentication successful, None otherwise
     """
-    result = await db.execute(
-        select(User).where(User.email == email, User.is_active == True)
-    )
-    user = result.scalar_one_or_none()
+    email = email.lower()
     
-    if not user:
+    # Repeats of a recently failed attempt are refused without paying for the hash
+    attempt_key = hashlib.blake2b(
+        f"{email}\0{password}".encode(), key=_FAILED_LOGIN_KEY, digest_size=16
+    ).digest()
+    if attempt_key in _failed_logins:
         return None
     
-    if not auth_manager.verify_password(password, user.password_hash):
+    result = await db.execute(_ACTIVE_USER_BY_EMAIL_STMT, {"email": email})
+    user = result.scalar_one_or_none()
+    
+    password_hash = user.password_hash if user else _DUMMY_PASSWORD_HASH
+    password_ok = await auth_manager.verify_password(password, password_hash)
+    
+    if not user or not password_ok:
+        # Only failures are remembered; successful logins are always verified
+        _failed_logins[attempt_key] = True
         return None
     
     return user
 
+
+def last_login_is_stale(user: User) -> bool:
+    """
+    Check whether a user's last_login is old enough to be rewritten.
+    
+    Args:
+        user: The authenticated user
+        
+    Returns:
+        bool: True if last_login is unset or older than LAST_LOGIN_RESOLUTION
+    """
+    if user.last_login is None:
+        return True
+    return datetime.now(timezone.utc) - user.last_login >= LAST_LOGIN_RESOLUTION
+
+
+async def record_last_login(user_id: UUID) -> None:
+    """
+    Update a user's last_login on a dedicated session.
+    
+    The UPDATE is guarded so that concurrent logins within
+    LAST_LOGIN_RESOLUTION do not rewrite the row more than once.
+    
+    Args:
+        user_id: ID of the user who logged in
+    """
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(User)
+            .where(
+                User.id == user_id,
+                or_(
+                    User.last_login.is_(None),
+                    User.last_login < func.now() - LAST_LOGIN_RESOLUTION
+                )
+            )
+            .values(last_login=func.now())
+        )
+        await db.commit()
+
+
+def password_needs_rehash(password_hash: str) -> bool:
+    """
+    Check whether a stored hash should be upgraded to the current Argon2id parameters.
+    
+    Args:
+        password_hash: Stored password hash
+        
+    Returns:
+        bool: True for legacy bcrypt hashes and Argon2 hashes with outdated parameters
+    """
+    if password_hash.startswith(_BCRYPT_PREFIXES):
+        return True
+    try:
+        return _PASSWORD_HASHER.check_needs_rehash(password_hash)
+    except InvalidHashError:
+        return False
+
+
+async def rehash_password(user_id: UUID, password: str, old_hash: str) -> None:
+    """
+    Re-hash a just-verified password with the current Argon2id parameters on a dedicated session.
+    
+    Runs as a background task after login so the plaintext never leaves the
+    process. The UPDATE only applies if the stored hash is still ``old_hash``,
+    so a concurrent password change is never overwritten.
+    
+    Args:
+        user_id: ID of the user who logged in
+        password: The verified plain text password
+        old_hash: The hash it was verified against
+    """
+    new_hash = await auth_manager.get_password_hash(password)
+    
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(User)
+            .where(User.id == user_id, User.password_hash == old_hash)
+            .values(password_hash=new_hash)
+        )
+        await db.commit()
@@ -0,0 +1,71 @@
+"""
+Redis cache helpers for the Expense Management System.
+Provides a shared async Redis client and a read-through cache for hot aggregates.
+"""
+
+import logging
+from typing import Any, Awaitable, Callable, Optional
+
+import orjson
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_redis: Optional[aioredis.Redis] = None
+
+
+def get_redis() -> aioredis.Redis:
+    """Return the shared async Redis client, creating it on first use."""
+    global _redis
+    if _redis is None:
+        _redis = aioredis.from_url(settings.redis_url)
+    return _redis
+
+
+async def close_cache() -> None:
+    """Close the shared Redis connection pool."""
+    global _redis
+    if _redis is not None:
+        await _redis.close()
+        _redis = None
+
+
+async def cache_get_or_set(
+    key: str,
+    ttl: int,
+    loader: Callable[[], Awaitable[Any]]
+) -> Any:
+    """
+    Return the cached value for a key, computing and storing it on a miss.
+
+    Redis failures are logged and fall through to the loader so that the
+    cache never breaks the request path.
+
+    Args:
+        key: Cache key
+        ttl: Time to live in seconds
+        loader: Coroutine factory that computes the value on a miss
+
+    Returns:
+        Any: Cached or freshly loaded value
+    """
+    client = get_redis()
+
+    try:
+        cached = await client.get(key)
+        if cached is not None:
+            return orjson.loads(cached)
+    except RedisError as e:
+        logger.warning(f"Cache read failed for {key}: {e}")
+
+    value = await loader()
+
+    try:
+        await client.set(key, orjson.dumps(value), ex=ttl)
+    except RedisError as e:
+        logger.warning(f"Cache write failed for {key}: {e}")
+
+    return value
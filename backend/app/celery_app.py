@@ -24,12 +24,18 @@ celery_app = Celery(
 
 # Configure Celery
 celery_app.conf.update(
-    task_serializer='json',
-    accept_content=['json'],
+    task_serializer='msgpack',
+    # json stays accepted so messages queued by not-yet-upgraded producers still run
+    accept_content=['msgpack', 'json'],
+    # Results can carry dates/Decimals from OCR, which kombu's json encoder handles
     result_serializer='json',
     timezone='UTC',
     enable_utc=True,
     task_track_started=True,
+    # Most tasks are fire-and-forget; tasks whose results are read opt back in
+    task_ignore_result=True,
+    result_compression='zstd',
+    result_expires=3600,
     task_time_limit=30 * 60,  # 30 minutes
     task_soft_time_limit=25 * 60,  # 25 minutes
     worker_prefetch_multiplier=1,
@@ -46,17 +52,9 @@ celery_app.conf.beat_schedule = {
         'task': 'app.tasks.notification_tasks.check_overdue_approvals',
         'schedule': crontab(minute=0),  # Every hour
     },
-    'cleanup-old-notifications': {
-        'task': 'app.tasks.cleanup_tasks.cleanup_old_notifications',
-        'schedule': crontab(hour=2, minute=0),  # Daily at 2 AM
-    },
-    'cleanup-old-audit-logs': {
-        'task': 'app.tasks.cleanup_tasks.cleanup_old_audit_logs',
-        'schedule': crontab(hour=3, minute=0),  # Daily at 3 AM
-    },
-    'backup-database': {
-        'task': 'app.tasks.cleanup_tasks.backup_database',
-        'schedule': crontab(hour=1, minute=0),  # Daily at 1 AM
+    'nightly-maintenance': {
+        'task': 'app.tasks.cleanup_tasks.nightly_maintenance',
+        'schedule': crontab(hour=1, minute=0),  # Daily at 1 AM: backup, then cleanups
     },
 }
 
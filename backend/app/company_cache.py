@@ -0,0 +1,42 @@
+"""
+In-process company settings cache for the Expense Management System.
+Keeps rarely-changing company attributes off the per-request query path.
+"""
+
+from typing import Optional
+from uuid import UUID
+
+from cachetools import TTLCache
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Company
+
+_base_currency_cache: TTLCache = TTLCache(maxsize=10_000, ttl=300)
+
+
+async def get_base_currency(company_id: UUID, db: AsyncSession) -> Optional[str]:
+    """
+    Get a company's base currency, reading the database only on a cache miss.
+
+    Args:
+        company_id: ID of the company
+        db: Database session
+
+    Returns:
+        Optional[str]: ISO currency code, or None if the company does not exist
+    """
+    base_currency = _base_currency_cache.get(company_id)
+    if base_currency is None:
+        result = await db.execute(
+            select(Company.base_currency).where(Company.id == company_id)
+        )
+        base_currency = result.scalar_one_or_none()
+        if base_currency is not None:
+            _base_currency_cache[company_id] = base_currency
+    return base_currency
+
+
+def invalidate_company(company_id: UUID) -> None:
+    """Drop cached settings for a company after it has been updated."""
+    _base_currency_cache.pop(company_id, None)
@@ -3,18 +3,53 @@ Database configuration and session management for the Expense Management System.
 Handles async PostgreSQL connections using SQLAlchemy.
 """
 
+from uuid import uuid4
+
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy import MetaData
+from sqlalchemy.pool import NullPool
 from config import settings
 
 
+if settings.db_use_pgbouncer:
+    # PgBouncer multiplexes server connections; a second pool in front of it only adds contention
+    _pool_options = {"poolclass": NullPool}
+    _connect_args = {
+        # Transaction pooling gives each transaction a different server connection, so
+        # prepared statements cannot be cached and need names unique across clients
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        # No server_settings: PgBouncer rejects unknown startup parameters, so set
+        # jit = off on the database role (ALTER ROLE ... SET jit = off) instead
+    }
+else:
+    _pool_options = {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_pre_ping": True,
+        # Reuse the most recently returned connection so idle ones can age out
+        "pool_use_lifo": True,
+        "pool_recycle": 300,
+    }
+    _connect_args = {
+        # Short OLTP queries pay JIT compilation cost without benefiting from it
+        "server_settings": {"jit": "off"},
+        # asyncpg server-side statement cache and SQLAlchemy's prepared statement cache
+        "statement_cache_size": settings.db_statement_cache_size,
+        "prepared_statement_cache_size": settings.db_statement_cache_size,
+    }
+
 # Create async engine
 engine = create_async_engine(
     settings.database_url,
     echo=settings.debug,
-    pool_pre_ping=True,
-    pool_recycle=300,
+    **_pool_options,
+    # SQLAlchemy compiled-statement cache; sized above the number of distinct statements
+    query_cache_size=settings.db_query_cache_size,
+    connect_args=_connect_args,
 )
 
 # Create async session factory
@@ -45,21 +80,14 @@ async def get_db() -> AsyncSession:
     Yields:
         AsyncSession: Database session instance
     """
+    # The context manager closes the session (rolling back any open transaction)
     async with AsyncSessionLocal() as session:
-        try:
-            yield session
-        finally:
-            await session.close()
+        yield session
 
 
 async def init_db():
     """Initialize database tables."""
     async with engine.begin() as conn:
-        # Import all models here to ensure they are registered
-        from app.models import (
-            Company, User, ExpenseCategory, ApprovalRule, Expense,
-            Approval, CurrencyRate, OCRResult, Notification, AuditLog
-        )
         await conn.run_sync(Base.metadata.create_all)
 
 
@@ -67,3 +95,7 @@ async def close_db():
     """Close database connections."""
     await engine.dispose()
 
+
+# Register all models at import time; app.models configures the mappers
+# once its classes are defined, so the first request does not pay for it.
+from app import models as _models  # noqa: E402,F401
@@ -0,0 +1,34 @@
+"""
+Identifier generation for the Expense Management System.
+Provides time-ordered UUIDs for primary keys of append-heavy tables.
+"""
+
+import os
+import time
+from uuid import UUID
+
+_RAND_A_MASK = (1 << 12) - 1
+_RAND_B_MASK = (1 << 62) - 1
+
+
+def uuid7() -> UUID:
+    """
+    Generate a UUID version 7 (RFC 9562).
+
+    The leading 48 bits are the Unix time in milliseconds, so keys created
+    close together sort together and inserts append to the right edge of
+    the primary key index instead of landing on random pages.
+
+    Returns:
+        UUID: Time-ordered random UUID
+    """
+    timestamp_ms = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10), "big")
+    value = (
+        (timestamp_ms & ((1 << 48) - 1)) << 80
+        | 0x7 << 76
+        | ((rand >> 68) & _RAND_A_MASK) << 64
+        | 0b10 << 62
+        | rand & _RAND_B_MASK
+    )
+    return UUID(int=value)
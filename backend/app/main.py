@@ -3,56 +3,56 @@ Main FastAPI application for the Expense Management System.
 Provides comprehensive REST API endpoints for all system functionality.
 """
 
+import asyncio
+import hashlib
 import logging
+import uuid
 from contextlib import asynccontextmanager
-from typing import List, Optional
 
-from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Form, Query, status
+import aiofiles
+from fastapi import FastAPI, BackgroundTasks, HTTPException, Depends, UploadFile, File, Form, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
-from fastapi.security import HTTPBearer
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from fastapi.staticfiles import StaticFiles
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import selectinload
 from pathlib import Path
 
 from config import settings
-from app.database import get_db, init_db, close_db
-from app.models import User, Company, Expense, Approval, Notification
+from app.cache import close_cache
+from app.company_cache import invalidate_company
+from app.database import AsyncSessionLocal, get_db, init_db, close_db
+from app.pagination import exact_count
+from app.models import User, Company
 from app.schemas import (
     # Company schemas
     CompanyCreate, CompanyUpdate, Company as CompanySchema,
     # User schemas
-    UserCreate, UserUpdate, UserInvite, User as UserSchema, UserWithCompany,
+    UserCreate, UserInvite, User as UserSchema, UserWithCompany,
     # Auth schemas
-    LoginRequest, Token, PasswordChange, PasswordReset,
-    # Expense schemas
-    ExpenseCategoryCreate, ExpenseCategoryUpdate, ExpenseCategory,
-    ApprovalRuleCreate, ApprovalRuleUpdate, ApprovalRule,
-    ExpenseCreate, ExpenseUpdate, Expense as ExpenseSchema, ExpenseWithDetails,
-    ApprovalCreate, ApprovalUpdate, Approval as ApprovalSchema, ApprovalWithDetails,
-    # Notification schemas
-    Notification as NotificationSchema, NotificationUpdate,
-    # Report schemas
-    ExpenseReportFilter, ExpenseReport, DashboardStats,
+    LoginRequest, Token, PasswordChange,
     # Pagination schemas
     PaginationParams, PaginatedResponse,
     # File schemas
     FileUploadResponse,
     # Enums
-    UserRole, ExpenseStatus, ApprovalStatus
+    AuditAction
 )
 from app.auth import (
-    auth_manager, get_current_active_user, require_admin, require_manager_or_admin,
-    verify_company_access, verify_user_access, authenticate_user
+    auth_manager, get_current_active_user, require_admin,
+    verify_company_access, verify_user_access, authenticate_user,
+    get_current_company as resolve_current_company,
+    last_login_is_stale, record_last_login, password_needs_rehash, rehash_password
 )
 
 # Import API routers
 from app.api import auth, expenses, approvals, notifications
-from app.services.currency_service import currency_service
 from app.services.ocr_service import ocr_service
-from app.services.approval_service import approval_service
 from app.services.notification_service import notification_service
 from app.services.audit_service import audit_service
+from app.services.notification_stream import notification_stream
 
 # Configure logging
 logging.basicConfig(
@@ -61,6 +61,29 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Bytes read per chunk when streaming uploads to disk
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Leading magic bytes of each uploadable type; extensions not listed are not sniffed
+FILE_SIGNATURES = {
+    "jpg": (b"\xff\xd8\xff",),
+    "jpeg": (b"\xff\xd8\xff",),
+    "png": (b"\x89PNG\r\n\x1a\n",),
+    "pdf": (b"%PDF-",),
+}
+
+# Columns selected for user listings
+_USER_FIELDS = list(UserSchema.model_fields)
+
+# Responses smaller than this many bytes are sent uncompressed
+GZIP_MINIMUM_SIZE = 1024
+
+# Streaming endpoints that must not be buffered by compression
+UNCOMPRESSED_PATHS = frozenset({"/notifications/stream"})
+
+# Uploaded files never change under the same name, so clients may reuse them
+FILE_CACHE_CONTROL = "private, max-age=3600"
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -69,12 +92,17 @@ async def lifespan(app: FastAPI):
     logger.info("Starting Expense Management System...")
     await init_db()
     logger.info("Database initialized successfully")
+    await audit_service.ensure_partitions()
+    audit_service.start_writer()
     
     yield
     
     # Shutdown
     logger.info("Shutting down Expense Management System...")
+    await audit_service.stop_writer()
+    await notification_stream.close()
     await close_db()
+    await close_cache()
     logger.info("Database connections closed")
 
 
@@ -85,6 +113,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -94,12 +123,40 @@ app.include_router(expenses.router)
 app.include_router(approvals.router)
 app.include_router(notifications.router)
 
+
+class UploadFiles(StaticFiles):
+    """Static file app for uploads that adds a client cache lifetime."""
+    
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers.setdefault("Cache-Control", FILE_CACHE_CONTROL)
+        return response
+
+
+# Uploaded files are served by Starlette directly (sendfile, ETag and 304 included)
+app.mount("/files", UploadFiles(directory=settings.upload_dir), name="files")
+
+
+class StreamAwareGZipMiddleware(GZipMiddleware):
+    """GZip middleware that passes server-sent event streams through uncompressed."""
+    
+    async def __call__(self, scope, receive, send):
+        # A gzip stream holds small events in its buffer instead of flushing them
+        if scope["type"] == "http" and scope["path"] in UNCOMPRESSED_PATHS:
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+# Compress JSON list responses; small bodies are not worth the CPU
+app.add_middleware(StreamAwareGZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=settings.cors_origins,
+    allow_origins=tuple(settings.cors_origins),
     allow_credentials=True,
-    allow_methods=["*"],
+    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
 )
 
@@ -108,48 +165,43 @@ app.add_middleware(
 @app.post("/auth/login", response_model=Token)
 async def login(
     login_data: LoginRequest,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db)
 ):
     """Authenticate user and return JWT tokens."""
-    try:
-        # Authenticate user
-        user = await authenticate_user(login_data.email, login_data.password, db)
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid email or password"
-            )
-        
-        # Create tokens
-        tokens = auth_manager.create_token_pair(
-            user_id=str(user.id),
-            company_id=str(user.company_id),
-            role=user.role.value
-        )
-        
-        # Update last login
-        from datetime import datetime
-        user.last_login = datetime.utcnow()
-        await db.commit()
-        
-        # Log audit trail
-        await audit_service.log_action(
-            company_id=str(user.company_id),
-            user_id=str(user.id),
-            action="login",
-            resource_type="user",
-            resource_id=str(user.id),
-            db=db
-        )
-        
-        return tokens
-        
-    except Exception as e:
-        logger.error(f"Login error: {e}")
+    # Authenticate user
+    user = await authenticate_user(login_data.email, login_data.password, db)
+    if not user:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Login failed"
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid email or password"
         )
+    
+    # Create tokens
+    tokens = auth_manager.create_token_pair(
+        user_id=str(user.id),
+        company_id=str(user.company_id),
+        role=user.role.value
+    )
+    
+    # Update last login after the response, at most once per LAST_LOGIN_RESOLUTION
+    if last_login_is_stale(user):
+        background_tasks.add_task(record_last_login, user.id)
+    
+    # Upgrade bcrypt hashes and outdated Argon2 parameters
+    if password_needs_rehash(user.password_hash):
+        background_tasks.add_task(rehash_password, user.id, login_data.password, user.password_hash)
+    
+    # Log audit trail
+    audit_service.enqueue(
+        company_id=user.company_id,
+        user_id=user.id,
+        action=AuditAction.login,
+        resource_type="user",
+        resource_id=user.id
+    )
+    
+    return tokens
 
 
 @app.post("/auth/refresh", response_model=Token)
@@ -158,46 +210,29 @@ async def refresh_token(
     db: AsyncSession = Depends(get_db)
 ):
     """Refresh access token using refresh token."""
-    try:
-        # Verify refresh token
-        payload = auth_manager.verify_token(refresh_token, "refresh")
-        user_id = payload.get("sub")
-        
-        if not user_id:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid refresh token"
-            )
-        
-        # Get user
-        result = await db.execute(
-            select(User).where(User.id == user_id, User.is_active == True)
-        )
-        user = result.scalar_one_or_none()
-        
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="User not found"
-            )
-        
-        # Create new tokens
-        tokens = auth_manager.create_token_pair(
-            user_id=str(user.id),
-            company_id=str(user.company_id),
-            role=user.role.value
-        )
-        
-        return tokens
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Token refresh error: {e}")
+    # Verify refresh token
+    claims = auth_manager.verify_token(refresh_token, "refresh")
+    
+    # Get user
+    result = await db.execute(
+        select(User).where(User.id == claims.sub, User.is_active == True)
+    )
+    user = result.scalar_one_or_none()
+    
+    if not user:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Token refresh failed"
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found"
         )
+    
+    # Create new tokens
+    tokens = auth_manager.create_token_pair(
+        user_id=str(user.id),
+        company_id=str(user.company_id),
+        role=user.role.value
+    )
+    
+    return tokens
 
 
 # Company endpoints
@@ -207,71 +242,36 @@ async def create_company(
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new company (admin only)."""
-    try:
-        # Check if this is the first company (allow creation)
-        result = await db.execute(select(Company))
-        company_count = len(result.scalars().all())
-        
-        if company_count > 0:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Only one company is allowed in this system"
-            )
-        
-        # Create company
-        company = Company(
-            name=company_data.name,
-            base_currency=company_data.base_currency,
-            is_active=company_data.is_active
-        )
-        
-        db.add(company)
-        await db.commit()
-        await db.refresh(company)
-        
-        logger.info(f"Created company: {company.name}")
-        return company
-        
-    except Exception as e:
-        logger.error(f"Error creating company: {e}")
-        await db.rollback()
+    # Check if this is the first company (allow creation)
+    result = await db.execute(select(Company.id).limit(1))
+    
+    if result.scalar_one_or_none() is not None:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to create company"
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only one company is allowed in this system"
         )
+    
+    # Create company
+    company = Company(
+        name=company_data.name,
+        base_currency=company_data.base_currency,
+        is_active=company_data.is_active
+    )
+    
+    db.add(company)
+    await db.commit()
+    
+    logger.info(f"Created company: {company.name}")
+    return company
 
 
 @app.get("/companies/current", response_model=CompanySchema)
 async def get_current_company(
-    current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    company: Company = Depends(resolve_current_company)
 ):
     """Get current user's company."""
-    try:
-        result = await db.execute(
-            db.query(Company).where(
-                Company.id == current_user.company_id,
-                Company.is_active == True
-            )
-        )
-        company = result.scalar_one_or_none()
-        
-        if not company:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Company not found"
-            )
-        
-        return company
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error getting company: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to get company"
-        )
+    # The company was loaded with the user during authentication
+    return company
 
 
 @app.put("/companies/current", response_model=CompanySchema)
@@ -281,51 +281,44 @@ async def update_company(
     db: AsyncSession = Depends(get_db)
 ):
     """Update current company (admin only)."""
-    try:
-        result = await db.execute(
-            db.query(Company).where(Company.id == current_user.company_id)
-        )
-        company = result.scalar_one_or_none()
-        
-        if not company:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Company not found"
-            )
-        
-        # Update company fields
-        if company_data.name is not None:
-            company.name = company_data.name
-        if company_data.base_currency is not None:
-            company.base_currency = company_data.base_currency
-        if company_data.is_active is not None:
-            company.is_active = company_data.is_active
-        
-        await db.commit()
-        await db.refresh(company)
-        
-        # Log audit trail
-        await audit_service.log_action(
-            company_id=str(company.id),
-            user_id=str(current_user.id),
-            action="update",
-            resource_type="company",
-            resource_id=str(company.id),
-            new_values=company_data.dict(exclude_unset=True),
-            db=db
-        )
-        
-        return company
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error updating company: {e}")
-        await db.rollback()
+    update_data = company_data.model_dump(exclude_none=True)
+    
+    # Update and fetch the row in one round-trip
+    if update_data:
+        stmt = (
+            update(Company)
+            .where(Company.id == current_user.company_id)
+            .values(**update_data)
+            .returning(Company)
+            # The current user's company is already in the identity map; overwrite it
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+    else:
+        stmt = select(Company).where(Company.id == current_user.company_id)
+    
+    result = await db.execute(stmt)
+    company = result.scalar_one_or_none()
+    
+    if not company:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to update company"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Company not found"
         )
+    
+    await db.commit()
+    invalidate_company(company.id)
+    
+    # Log audit trail
+    audit_service.enqueue(
+        company_id=company.id,
+        user_id=current_user.id,
+        action=AuditAction.update,
+        resource_type="company",
+        resource_id=company.id,
+        new_values=company_data.model_dump(exclude_unset=True)
+    )
+    
+    return company
 
 
 # User management endpoints
@@ -336,70 +329,57 @@ async def create_user(
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new user (admin only)."""
-    try:
-        # Verify company access
-        if not verify_company_access(current_user, str(user_data.company_id)):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Access denied to this company"
-            )
-        
-        # Check if user already exists
-        result = await db.execute(
-            db.query(User).where(User.email == user_data.email)
-        )
-        existing_user = result.scalar_one_or_none()
-        
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="User with this email already exists"
-            )
-        
-        # Create user
-        user = User(
-            company_id=user_data.company_id,
-            email=user_data.email,
-            password_hash=auth_manager.get_password_hash(user_data.password),
-            first_name=user_data.first_name,
-            last_name=user_data.last_name,
-            role=user_data.role,
-            is_active=user_data.is_active,
-            created_by=current_user.id
-        )
-        
-        db.add(user)
-        await db.commit()
-        await db.refresh(user)
-        
-        # Log audit trail
-        await audit_service.log_action(
-            company_id=str(user.company_id),
-            user_id=str(current_user.id),
-            action="create",
-            resource_type="user",
-            resource_id=str(user.id),
-            new_values={
-                "email": user.email,
-                "role": user.role.value,
-                "first_name": user.first_name,
-                "last_name": user.last_name
-            },
-            db=db
+    # Verify company access
+    if not verify_company_access(current_user, str(user_data.company_id)):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied to this company"
         )
-        
-        logger.info(f"Created user: {user.email}")
-        return user
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error creating user: {e}")
-        await db.rollback()
+    
+    # Check if user already exists
+    result = await db.execute(
+        select(User.id).where(func.lower(User.email) == user_data.email.lower()).limit(1)
+    )
+    existing_user = result.scalar_one_or_none()
+    
+    if existing_user:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to create user"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User with this email already exists"
         )
+    
+    # Create user
+    user = User(
+        company_id=user_data.company_id,
+        email=user_data.email,
+        password_hash=await auth_manager.get_password_hash(user_data.password),
+        first_name=user_data.first_name,
+        last_name=user_data.last_name,
+        role=user_data.role,
+        is_active=user_data.is_active,
+        created_by=current_user.id
+    )
+    
+    db.add(user)
+    await db.commit()
+    
+    # Log audit trail
+    audit_service.enqueue(
+        company_id=user.company_id,
+        user_id=current_user.id,
+        action=AuditAction.create,
+        resource_type="user",
+        resource_id=user.id,
+        new_values={
+            "email": user.email,
+            "role": user.role.value,
+            "first_name": user.first_name,
+            "last_name": user.last_name
+        }
+    )
+    
+    logger.info(f"Created user: {user.email}")
+    return user
 
 
 @app.post("/users/invite", response_model=UserSchema)
@@ -409,74 +389,61 @@ async def invite_user(
     db: AsyncSession = Depends(get_db)
 ):
     """Invite a new user by email (admin only)."""
-    try:
-        # Check if user already exists
-        result = await db.execute(
-            db.query(User).where(User.email == user_data.email)
-        )
-        existing_user = result.scalar_one_or_none()
-        
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="User with this email already exists"
-            )
-        
-        # Generate temporary password
-        temp_password = auth_manager.generate_random_password()
-        
-        # Create user
-        user = User(
-            company_id=current_user.company_id,
-            email=user_data.email,
-            password_hash=auth_manager.get_password_hash(temp_password),
-            first_name=user_data.first_name,
-            last_name=user_data.last_name,
-            role=user_data.role,
-            must_change_password=True,
-            created_by=current_user.id
-        )
-        
-        db.add(user)
-        await db.commit()
-        await db.refresh(user)
-        
-        # Send invitation email
-        await notification_service.send_invitation_email(
-            email=user.email,
-            first_name=user.first_name,
-            last_name=user.last_name,
-            role=user.role.value,
-            temp_password=temp_password,
-            db=db
-        )
-        
-        # Log audit trail
-        await audit_service.log_action(
-            company_id=str(user.company_id),
-            user_id=str(current_user.id),
-            action="invite_sent",
-            resource_type="user",
-            resource_id=str(user.id),
-            new_values={
-                "email": user.email,
-                "role": user.role.value
-            },
-            db=db
-        )
-        
-        logger.info(f"Invited user: {user.email}")
-        return user
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error inviting user: {e}")
-        await db.rollback()
+    # Check if user already exists
+    result = await db.execute(
+        select(User.id).where(func.lower(User.email) == user_data.email.lower()).limit(1)
+    )
+    existing_user = result.scalar_one_or_none()
+    
+    if existing_user:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to invite user"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User with this email already exists"
         )
+    
+    # Generate temporary password
+    temp_password = auth_manager.generate_random_password()
+    
+    # Create user
+    user = User(
+        company_id=current_user.company_id,
+        email=user_data.email,
+        password_hash=await auth_manager.get_password_hash(temp_password),
+        first_name=user_data.first_name,
+        last_name=user_data.last_name,
+        role=user_data.role,
+        must_change_password=True,
+        created_by=current_user.id
+    )
+    
+    db.add(user)
+    await db.commit()
+    
+    # Send invitation email
+    await notification_service.send_invitation_email(
+        email=user.email,
+        first_name=user.first_name,
+        last_name=user.last_name,
+        role=user.role.value,
+        temp_password=temp_password,
+        db=db
+    )
+    
+    # Log audit trail
+    audit_service.enqueue(
+        company_id=user.company_id,
+        user_id=current_user.id,
+        action=AuditAction.invite_sent,
+        resource_type="user",
+        resource_id=user.id,
+        new_values={
+            "email": user.email,
+            "role": user.role.value
+        }
+    )
+    
+    logger.info(f"Invited user: {user.email}")
+    return user
 
 
 @app.get("/users", response_model=PaginatedResponse)
@@ -486,38 +453,32 @@ async def get_users(
     pagination: PaginationParams = Depends()
 ):
     """Get users for current company."""
-    try:
-        # Build query
-        query = db.query(User).where(User.company_id == current_user.company_id)
-        
-        # Get total count
-        count_result = await db.execute(
-            query.with_entities(db.func.count(User.id))
-        )
-        total_count = count_result.scalar()
-        
-        # Get paginated results
-        result = await db.execute(
-            query.offset((pagination.page - 1) * pagination.size)
-            .limit(pagination.size)
-            .options(db.selectinload(User.company))
-        )
-        users = result.scalars().all()
-        
-        return PaginatedResponse(
-            items=[UserWithCompany.from_orm(user) for user in users],
-            total=total_count,
-            page=pagination.page,
-            size=pagination.size,
-            pages=(total_count + pagination.size - 1) // pagination.size
-        )
-        
-    except Exception as e:
-        logger.error(f"Error getting users: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to get users"
+    # Plain columns: rows are read-only here and need no ORM identity tracking
+    page_stmt = (
+        select(*[getattr(User, name) for name in _USER_FIELDS])
+        .where(User.company_id == current_user.company_id)
+        .order_by(User.created_at, User.id)
+        .offset((pagination.page - 1) * pagination.size)
+        .limit(pagination.size)
+    )
+    
+    # Count on a second connection so it runs concurrently with the page fetch
+    async with AsyncSessionLocal() as count_db:
+        total_count, result = await asyncio.gather(
+            exact_count(count_db, select(User.id).where(User.company_id == current_user.company_id)),
+            db.execute(page_stmt)
         )
+    
+    # Every listed user belongs to the caller's company, loaded during authentication
+    company = CompanySchema.model_validate(current_user.company)
+    
+    return PaginatedResponse(
+        items=[UserWithCompany.model_construct(**row._mapping, company=company) for row in result],
+        total=total_count,
+        page=pagination.page,
+        size=pagination.size,
+        pages=(total_count + pagination.size - 1) // pagination.size
+    )
 
 
 @app.get("/users/{user_id}", response_model=UserWithCompany)
@@ -527,37 +488,27 @@ async def get_user(
     db: AsyncSession = Depends(get_db)
 ):
     """Get user by ID."""
-    try:
-        # Verify access
-        if not verify_user_access(current_user, user_id):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Access denied"
-            )
-        
-        result = await db.execute(
-            db.query(User)
-            .where(User.id == user_id, User.company_id == current_user.company_id)
-            .options(db.selectinload(User.company))
+    # Verify access
+    if not verify_user_access(current_user, user_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
         )
-        user = result.scalar_one_or_none()
-        
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
-        return UserWithCompany.from_orm(user)
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error getting user: {e}")
+    
+    result = await db.execute(
+        select(User)
+        .where(User.id == user_id, User.company_id == current_user.company_id)
+        .options(selectinload(User.company))
+    )
+    user = result.scalar_one_or_none()
+    
+    if not user:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to get user"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
         )
+    
+    return UserWithCompany.model_validate(user)
 
 
 # Password management endpoints
@@ -568,41 +519,31 @@ async def change_password(
     db: AsyncSession = Depends(get_db)
 ):
     """Change user password."""
-    try:
-        # Verify current password
-        if not auth_manager.verify_password(password_data.current_password, current_user.password_hash):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Current password is incorrect"
-            )
-        
-        # Update password
-        current_user.password_hash = auth_manager.get_password_hash(password_data.new_password)
-        current_user.must_change_password = False
-        
-        await db.commit()
-        
-        # Log audit trail
-        await audit_service.log_action(
-            company_id=str(current_user.company_id),
-            user_id=str(current_user.id),
-            action="password_change",
-            resource_type="user",
-            resource_id=str(current_user.id),
-            db=db
-        )
-        
-        return {"message": "Password changed successfully"}
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error changing password: {e}")
-        await db.rollback()
+    # Verify current password
+    if not await auth_manager.verify_password(
+        password_data.current_password, current_user.password_hash
+    ):
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to change password"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Current password is incorrect"
         )
+    
+    # Update password
+    current_user.password_hash = await auth_manager.get_password_hash(password_data.new_password)
+    current_user.must_change_password = False
+    
+    await db.commit()
+    
+    # Log audit trail
+    audit_service.enqueue(
+        company_id=current_user.company_id,
+        user_id=current_user.id,
+        action=AuditAction.password_change,
+        resource_type="user",
+        resource_id=current_user.id
+    )
+    
+    return {"message": "Password changed successfully"}
 
 
 # File upload endpoints
@@ -612,84 +553,64 @@ async def upload_file(
     current_user: User = Depends(get_current_active_user)
 ):
     """Upload a file (receipt image)."""
-    try:
-        # Validate file type
-        if not file.filename:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="No file provided"
-            )
-        
-        file_ext = file.filename.split('.')[-1].lower()
-        if file_ext not in settings.allowed_extensions:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"File type not allowed. Allowed types: {', '.join(settings.allowed_extensions)}"
-            )
-        
-        # Validate file size
-        content = await file.read()
-        if len(content) > settings.max_file_size:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"File too large. Maximum size: {settings.max_file_size} bytes"
-            )
-        
-        # Save file
-        import uuid
-        import os
-        from pathlib import Path
-        
-        file_id = str(uuid.uuid4())
-        filename = f"{file_id}.{file_ext}"
-        file_path = Path(settings.upload_dir) / filename
-        
-        # Ensure upload directory exists
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        # Write file
-        with open(file_path, "wb") as f:
-            f.write(content)
-        
-        return FileUploadResponse(
-            filename=filename,
-            url=f"/files/{filename}",
-            size=len(content),
-            content_type=file.content_type or "application/octet-stream"
+    # Validate file type
+    if not file.filename:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No file provided"
         )
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error uploading file: {e}")
+    
+    file_ext = file.filename.split('.')[-1].lower()
+    if file_ext not in settings.allowed_extensions:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to upload file"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File type not allowed. Allowed types: {', '.join(sorted(settings.allowed_extensions))}"
         )
-
-
-@app.get("/files/{filename}")
-async def get_file(filename: str):
-    """Get uploaded file."""
-    try:
-        file_path = Path(settings.upload_dir) / filename
-        
-        if not file_path.exists():
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="File not found"
-            )
-        
-        return FileResponse(file_path)
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error getting file: {e}")
+    
+    # Reject content whose leading bytes contradict the extension
+    head = await file.read(UPLOAD_CHUNK_SIZE)
+    signatures = FILE_SIGNATURES.get(file_ext)
+    if signatures is not None and not head.startswith(signatures):
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to get file"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File content does not match its type"
         )
+    
+    # Save file
+    file_id = str(uuid.uuid4())
+    filename = f"{file_id}.{file_ext}"
+    file_path = Path(settings.upload_dir) / filename
+    
+    # Ensure upload directory exists
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    
+    # Stream to disk in chunks, enforcing the size limit as bytes arrive
+    size = 0
+    digest = hashlib.sha256()
+    try:
+        async with aiofiles.open(file_path, "wb") as out:
+            chunk = head
+            while chunk:
+                size += len(chunk)
+                if size > settings.max_file_size:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"File too large. Maximum size: {settings.max_file_size} bytes"
+                    )
+                digest.update(chunk)
+                await out.write(chunk)
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+    except BaseException:
+        file_path.unlink(missing_ok=True)
+        raise
+    
+    return FileUploadResponse(
+        filename=filename,
+        url=f"/files/{filename}",
+        size=size,
+        content_type=file.content_type or "application/octet-stream",
+        sha256=digest.hexdigest()
+    )
 
 
 # OCR endpoints
@@ -699,40 +620,14 @@ async def process_receipt_ocr(
     current_user: User = Depends(get_current_active_user)
 ):
     """Process receipt image with OCR."""
-    try:
-        # Save uploaded file temporarily
-        import tempfile
-        import uuid
-        
-        file_id = str(uuid.uuid4())
-        file_ext = file.filename.split('.')[-1].lower()
-        temp_filename = f"{file_id}.{file_ext}"
-        
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{file_ext}") as temp_file:
-            content = await file.read()
-            temp_file.write(content)
-            temp_path = temp_file.name
-        
-        try:
-            # Process with OCR
-            ocr_result = await ocr_service.process_receipt(temp_path)
-            
-            return {
-                "success": True,
-                "data": ocr_result
-            }
-            
-        finally:
-            # Clean up temporary file
-            import os
-            os.unlink(temp_path)
-        
-    except Exception as e:
-        logger.error(f"Error processing OCR: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to process receipt"
-        )
+    # OCR straight from memory; the upload is never written to disk
+    content = await file.read()
+    ocr_result = await ocr_service.process_receipt_bytes(content)
+    
+    return {
+        "success": True,
+        "data": ocr_result
+    }
 
 
 # Health check endpoint
@@ -746,17 +641,19 @@ async def health_check():
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
     """Handle HTTP exceptions."""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
-        content={"detail": exc.detail}
+        content={"detail": exc.detail},
+        headers=exc.headers
     )
 
 
 @app.exception_handler(Exception)
 async def general_exception_handler(request, exc):
-    """Handle general exceptions."""
-    logger.error(f"Unhandled exception: {exc}")
-    return JSONResponse(
+    """Handle general exceptions, so endpoints need no try/except of their own."""
+    # The request-scoped session is rolled back when get_db closes it
+    logger.error("Unhandled exception in %s %s", request.method, request.url.path, exc_info=exc)
+    return ORJSONResponse(
         status_code=500,
         content={"detail": "Internal server error"}
     )
@@ -768,5 +665,8 @@ if __name__ == "__main__":
         "app.main:app",
         host=settings.host,
         port=settings.port,
-        reload=settings.debug
+        reload=settings.debug,
+        # Provided by uvicorn[standard]; named explicitly so a missing extra fails loudly
+        loop="uvloop",
+        http="httptools"
     )
@@ -9,22 +9,36 @@ from typing import Optional, List
 from uuid import UUID, uuid4
 
 from sqlalchemy import (
-    Column, String, Boolean, DateTime, Date, Text, ForeignKey,
-    Numeric, Integer, Enum, JSON, Index, CheckConstraint, UniqueConstraint
+    Column, String, Boolean, DateTime, Date, Text, ForeignKey, DDL,
+    Numeric, Integer, Enum, Index, CheckConstraint, UniqueConstraint, event, text
 )
-from sqlalchemy.dialects.postgresql import UUID as PostgresUUID, INET
+from sqlalchemy.dialects.postgresql import UUID as PostgresUUID, INET, JSONB
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from sqlalchemy.sql import func
 
 from app.database import Base
+from app.ids import uuid7
 from app.schemas import (
     UserRole, ExpenseStatus, ApprovalType, ApprovalStatus,
     NotificationType, AuditAction
 )
 
 
+# Column types for the PostgreSQL enums created by database/schema.sql; without
+# explicit names SQLAlchemy would bind-cast to its own names (e.g. ``userrole``)
+_USER_ROLE = Enum(UserRole, name="user_role")
+_APPROVAL_TYPE = Enum(ApprovalType, name="approval_type")
+_EXPENSE_STATUS = Enum(ExpenseStatus, name="expense_status")
+_APPROVAL_STATUS = Enum(ApprovalStatus, name="approval_status")
+_NOTIFICATION_TYPE = Enum(NotificationType, name="notification_type")
+_AUDIT_ACTION = Enum(AuditAction, name="audit_action")
+
+
 class TimestampMixin:
     """Mixin to add created_at and updated_at timestamps."""
+    # Fetch server-generated timestamps with INSERT/UPDATE ... RETURNING instead of a refresh
+    __mapper_args__ = {"eager_defaults": True}
+    
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
@@ -38,12 +52,12 @@ class Company(Base, TimestampMixin):
     base_currency: Mapped[str] = mapped_column(String(3), nullable=False, default="USD")
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     
-    # Relationships
-    users: Mapped[List["User"]] = relationship("User", back_populates="company", cascade="all, delete-orphan")
-    expense_categories: Mapped[List["ExpenseCategory"]] = relationship("ExpenseCategory", back_populates="company", cascade="all, delete-orphan")
-    approval_rules: Mapped[List["ApprovalRule"]] = relationship("ApprovalRule", back_populates="company", cascade="all, delete-orphan")
-    expenses: Mapped[List["Expense"]] = relationship("Expense", back_populates="company", cascade="all, delete-orphan")
-    audit_logs: Mapped[List["AuditLog"]] = relationship("AuditLog", back_populates="company")
+    # Relationships; collections are never lazy-loaded and deletes cascade in the database
+    users: Mapped[List["User"]] = relationship("User", back_populates="company", cascade="all, delete-orphan", lazy="raise", passive_deletes=True)
+    expense_categories: Mapped[List["ExpenseCategory"]] = relationship("ExpenseCategory", back_populates="company", cascade="all, delete-orphan", lazy="raise", passive_deletes=True)
+    approval_rules: Mapped[List["ApprovalRule"]] = relationship("ApprovalRule", back_populates="company", cascade="all, delete-orphan", lazy="raise", passive_deletes=True)
+    expenses: Mapped[List["Expense"]] = relationship("Expense", back_populates="company", cascade="all, delete-orphan", lazy="raise", passive_deletes=True)
+    audit_logs: Mapped[List["AuditLog"]] = relationship("AuditLog", back_populates="company", lazy="raise", passive_deletes=True)
     
     __table_args__ = (
         Index("idx_companies_name", "name"),
@@ -60,24 +74,28 @@ class User(Base, TimestampMixin):
     password_hash: Mapped[str] = mapped_column(String(255), nullable=False)
     first_name: Mapped[str] = mapped_column(String(100), nullable=False)
     last_name: Mapped[str] = mapped_column(String(100), nullable=False)
-    role: Mapped[UserRole] = mapped_column(Enum(UserRole), nullable=False)
+    role: Mapped[UserRole] = mapped_column(_USER_ROLE, nullable=False)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     must_change_password: Mapped[bool] = mapped_column(Boolean, default=True)
     last_login: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    # Maintained by the maintain_notifications_unread_count trigger
+    unread_notification_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default=text("0"))
     created_by: Mapped[Optional[UUID]] = mapped_column(PostgresUUID(as_uuid=True), ForeignKey("users.id"))
     
     # Relationships
     company: Mapped["Company"] = relationship("Company", back_populates="users")
     created_by_user: Mapped[Optional["User"]] = relationship("User", remote_side=[id])
-    expenses: Mapped[List["Expense"]] = relationship("Expense", back_populates="user", cascade="all, delete-orphan")
-    approvals: Mapped[List["Approval"]] = relationship("Approval", back_populates="approver", cascade="all, delete-orphan")
-    approval_rules: Mapped[List["ApprovalRule"]] = relationship("ApprovalRule", back_populates="user", cascade="all, delete-orphan")
-    notifications: Mapped[List["Notification"]] = relationship("Notification", back_populates="user", cascade="all, delete-orphan")
-    audit_logs: Mapped[List["AuditLog"]] = relationship("AuditLog", back_populates="user")
+    expenses: Mapped[List["Expense"]] = relationship("Expense", back_populates="user", cascade="all, delete-orphan", lazy="raise", passive_deletes=True)
+    approvals: Mapped[List["Approval"]] = relationship("Approval", back_populates="approver", cascade="all, delete-orphan", lazy="raise", passive_deletes=True)
+    # ApprovalRule also references users through created_by; join on the assigned approver
+    approval_rules: Mapped[List["ApprovalRule"]] = relationship("ApprovalRule", back_populates="user", foreign_keys="ApprovalRule.user_id", cascade="all, delete-orphan", lazy="raise", passive_deletes=True)
+    notifications: Mapped[List["Notification"]] = relationship("Notification", back_populates="user", cascade="all, delete-orphan", lazy="raise", passive_deletes=True)
+    audit_logs: Mapped[List["AuditLog"]] = relationship("AuditLog", back_populates="user", lazy="raise", passive_deletes=True)
     
     __table_args__ = (
         Index("idx_users_company_email", "company_id", "email"),
         Index("idx_users_role", "role"),
+        Index("idx_users_email_lower", text("lower(email)"), unique=True),
         UniqueConstraint("company_id", "email", name="uq_users_company_email"),
     )
 
@@ -100,7 +118,7 @@ class ExpenseCategory(Base, TimestampMixin):
     approval_rules: Mapped[List["ApprovalRule"]] = relationship("ApprovalRule", back_populates="category", cascade="all, delete-orphan")
     
     __table_args__ = (
-        Index("idx_expense_categories_company", "company_id"),
+        # Also serves company_id lookups; no separate single-column index
         UniqueConstraint("company_id", "name", name="uq_expense_categories_company_name"),
     )
 
@@ -113,7 +131,7 @@ class ApprovalRule(Base, TimestampMixin):
     company_id: Mapped[UUID] = mapped_column(PostgresUUID(as_uuid=True), ForeignKey("companies.id", ondelete="CASCADE"), nullable=False)
     category_id: Mapped[Optional[UUID]] = mapped_column(PostgresUUID(as_uuid=True), ForeignKey("expense_categories.id", ondelete="CASCADE"))
     user_id: Mapped[UUID] = mapped_column(PostgresUUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    approval_type: Mapped[ApprovalType] = mapped_column(Enum(ApprovalType), nullable=False)
+    approval_type: Mapped[ApprovalType] = mapped_column(_APPROVAL_TYPE, nullable=False)
     is_sequential: Mapped[bool] = mapped_column(Boolean, default=False)
     order_index: Mapped[int] = mapped_column(Integer, default=0)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
@@ -122,11 +140,13 @@ class ApprovalRule(Base, TimestampMixin):
     # Relationships
     company: Mapped["Company"] = relationship("Company", back_populates="approval_rules")
     category: Mapped[Optional["ExpenseCategory"]] = relationship("ExpenseCategory", back_populates="approval_rules")
-    user: Mapped["User"] = relationship("User", back_populates="approval_rules")
+    user: Mapped["User"] = relationship("User", back_populates="approval_rules", foreign_keys=[user_id])
     created_by_user: Mapped["User"] = relationship("User", foreign_keys=[created_by])
     
     __table_args__ = (
-        Index("idx_approval_rules_category", "category_id"),
+        # Rules are read per category in order_index order
+        Index("idx_approval_rules_category_order", "category_id", "order_index"),
+        # Back the ON DELETE CASCADE foreign keys from users and companies
         Index("idx_approval_rules_user", "user_id"),
         Index("idx_approval_rules_company", "company_id"),
     )
@@ -136,7 +156,8 @@ class Expense(Base, TimestampMixin):
     """Expense entity - represents individual expense submissions."""
     __tablename__ = "expenses"
     
-    id: Mapped[UUID] = mapped_column(PostgresUUID(as_uuid=True), primary_key=True, default=uuid4)
+    # Append-heavy tables use time-ordered uuid7 keys so inserts stay on the right edge of the index
+    id: Mapped[UUID] = mapped_column(PostgresUUID(as_uuid=True), primary_key=True, default=uuid7)
     company_id: Mapped[UUID] = mapped_column(PostgresUUID(as_uuid=True), ForeignKey("companies.id", ondelete="CASCADE"), nullable=False)
     user_id: Mapped[UUID] = mapped_column(PostgresUUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     category_id: Mapped[UUID] = mapped_column(PostgresUUID(as_uuid=True), ForeignKey("expense_categories.id"), nullable=False)
@@ -150,20 +171,32 @@ class Expense(Base, TimestampMixin):
     paid_by: Mapped[str] = mapped_column(String(100), nullable=False)
     remarks: Mapped[Optional[str]] = mapped_column(Text)
     receipt_url: Mapped[Optional[str]] = mapped_column(String(500))
-    status: Mapped[ExpenseStatus] = mapped_column(Enum(ExpenseStatus), default=ExpenseStatus.draft)
+    status: Mapped[ExpenseStatus] = mapped_column(_EXPENSE_STATUS, default=ExpenseStatus.draft)
     submitted_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
     
     # Relationships
     company: Mapped["Company"] = relationship("Company", back_populates="expenses")
-    user: Mapped["User"] = relationship("User", back_populates="expenses")
-    category: Mapped["ExpenseCategory"] = relationship("ExpenseCategory", back_populates="expenses")
-    approvals: Mapped[List["Approval"]] = relationship("Approval", back_populates="expense", cascade="all, delete-orphan")
-    ocr_results: Mapped[List["OCRResult"]] = relationship("OCRResult", back_populates="expense", cascade="all, delete-orphan")
+    user: Mapped["User"] = relationship("User", back_populates="expenses", lazy="raise")
+    category: Mapped["ExpenseCategory"] = relationship("ExpenseCategory", back_populates="expenses", lazy="raise")
+    approvals: Mapped[List["Approval"]] = relationship("Approval", back_populates="expense", cascade="all, delete-orphan", lazy="raise", passive_deletes=True)
+    ocr_results: Mapped[List["OCRResult"]] = relationship("OCRResult", back_populates="expense", cascade="all, delete-orphan", lazy="raise", passive_deletes=True)
     
     __table_args__ = (
         Index("idx_expenses_user_status", "user_id", "status"),
         Index("idx_expenses_company_date", "company_id", "expense_date"),
+        Index("idx_expenses_company_user_date", "company_id", "user_id", "expense_date"),
+        Index("idx_expenses_company_created", "company_id", "created_at", "id"),
+        # Employee listing in keyset order; an optional status filter is checked per fetched row
+        Index("idx_expenses_company_user_created", "company_id", "user_id", "created_at", "id"),
         Index("idx_expenses_category", "category_id"),
+        Index(
+            "idx_expenses_company_status_date_covering", "company_id", "status", "expense_date",
+            postgresql_include=["amount_in_base_currency", "currency"]
+        ),
+        Index(
+            "idx_expenses_submitted_at", "submitted_at",
+            postgresql_where=text("submitted_at IS NOT NULL")
+        ),
         CheckConstraint("amount > 0", name="ck_expenses_positive_amount"),
         CheckConstraint("amount_in_base_currency > 0", name="ck_expenses_positive_base_amount"),
     )
@@ -173,20 +206,24 @@ class Approval(Base, TimestampMixin):
     """Approval entity - tracks individual approval actions on expenses."""
     __tablename__ = "approvals"
     
-    id: Mapped[UUID] = mapped_column(PostgresUUID(as_uuid=True), primary_key=True, default=uuid4)
+    id: Mapped[UUID] = mapped_column(PostgresUUID(as_uuid=True), primary_key=True, default=uuid7)
     expense_id: Mapped[UUID] = mapped_column(PostgresUUID(as_uuid=True), ForeignKey("expenses.id", ondelete="CASCADE"), nullable=False)
     approver_id: Mapped[UUID] = mapped_column(PostgresUUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    status: Mapped[ApprovalStatus] = mapped_column(Enum(ApprovalStatus), default=ApprovalStatus.pending)
+    status: Mapped[ApprovalStatus] = mapped_column(_APPROVAL_STATUS, default=ApprovalStatus.pending)
     comments: Mapped[Optional[str]] = mapped_column(Text)
     approved_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
     
     # Relationships
-    expense: Mapped["Expense"] = relationship("Expense", back_populates="approvals")
-    approver: Mapped["User"] = relationship("User", back_populates="approvals")
+    expense: Mapped["Expense"] = relationship("Expense", back_populates="approvals", lazy="raise")
+    approver: Mapped["User"] = relationship("User", back_populates="approvals", lazy="raise")
     
     __table_args__ = (
         Index("idx_approvals_expense_status", "expense_id", "status"),
-        Index("idx_approvals_approver", "approver_id", "status"),
+        Index(
+            "idx_approvals_approver_pending", "approver_id", "created_at", "id",
+            postgresql_where=text("status = 'pending'")
+        ),
+        Index("idx_approvals_approver_approved", "approver_id", "approved_at", "id"),
         UniqueConstraint("expense_id", "approver_id", name="uq_approvals_expense_approver"),
     )
 
@@ -212,7 +249,7 @@ class OCRResult(Base, TimestampMixin):
     """OCR result entity - stores OCR processing results for receipts."""
     __tablename__ = "ocr_results"
     
-    id: Mapped[UUID] = mapped_column(PostgresUUID(as_uuid=True), primary_key=True, default=uuid4)
+    id: Mapped[UUID] = mapped_column(PostgresUUID(as_uuid=True), primary_key=True, default=uuid7)
     expense_id: Mapped[Optional[UUID]] = mapped_column(PostgresUUID(as_uuid=True), ForeignKey("expenses.id", ondelete="CASCADE"))
     receipt_url: Mapped[str] = mapped_column(String(500), nullable=False)
     detected_amount: Mapped[Optional[Decimal]] = mapped_column(Numeric(15, 2))
@@ -230,20 +267,25 @@ class Notification(Base, TimestampMixin):
     """Notification entity - stores system notifications for users."""
     __tablename__ = "notifications"
     
-    id: Mapped[UUID] = mapped_column(PostgresUUID(as_uuid=True), primary_key=True, default=uuid4)
+    id: Mapped[UUID] = mapped_column(PostgresUUID(as_uuid=True), primary_key=True, default=uuid7)
     user_id: Mapped[UUID] = mapped_column(PostgresUUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    type: Mapped[NotificationType] = mapped_column(Enum(NotificationType), nullable=False)
+    type: Mapped[NotificationType] = mapped_column(_NOTIFICATION_TYPE, nullable=False)
     title: Mapped[str] = mapped_column(String(255), nullable=False)
     message: Mapped[str] = mapped_column(Text, nullable=False)
     is_read: Mapped[bool] = mapped_column(Boolean, default=False)
-    metadata: Mapped[Optional[dict]] = mapped_column(JSON)
+    # "metadata" is reserved on declarative classes, so the column is mapped as meta
+    meta: Mapped[Optional[dict]] = mapped_column("metadata", JSONB)
     read_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
     
     # Relationships
     user: Mapped["User"] = relationship("User", back_populates="notifications")
     
     __table_args__ = (
-        Index("idx_notifications_user_unread", "user_id", "is_read"),
+        Index("idx_notifications_user_created", "user_id", "created_at", "id"),
+        Index(
+            "idx_notifications_unread_partial", "user_id", "created_at",
+            postgresql_where=text("is_read = false")
+        ),
     )
 
 
@@ -251,16 +293,21 @@ class AuditLog(Base, TimestampMixin):
     """Audit log entity - tracks all system actions for compliance."""
     __tablename__ = "audit_logs"
     
-    id: Mapped[UUID] = mapped_column(PostgresUUID(as_uuid=True), primary_key=True, default=uuid4)
+    id: Mapped[UUID] = mapped_column(PostgresUUID(as_uuid=True), primary_key=True, default=uuid7)
     company_id: Mapped[Optional[UUID]] = mapped_column(PostgresUUID(as_uuid=True), ForeignKey("companies.id", ondelete="CASCADE"))
     user_id: Mapped[Optional[UUID]] = mapped_column(PostgresUUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"))
-    action: Mapped[AuditAction] = mapped_column(Enum(AuditAction), nullable=False)
+    action: Mapped[AuditAction] = mapped_column(_AUDIT_ACTION, nullable=False)
     resource_type: Mapped[str] = mapped_column(String(50), nullable=False)
     resource_id: Mapped[Optional[UUID]] = mapped_column(PostgresUUID(as_uuid=True))
-    old_values: Mapped[Optional[dict]] = mapped_column(JSON)
-    new_values: Mapped[Optional[dict]] = mapped_column(JSON)
+    # Payloads dominate row width; loaded only where a query undefers them
+    old_values: Mapped[Optional[dict]] = mapped_column(JSONB, deferred=True, deferred_raiseload=True)
+    new_values: Mapped[Optional[dict]] = mapped_column(JSONB, deferred=True, deferred_raiseload=True)
     ip_address: Mapped[Optional[str]] = mapped_column(INET)
     user_agent: Mapped[Optional[str]] = mapped_column(Text)
+    # Partition key; PostgreSQL requires it in the primary key of a partitioned table
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), primary_key=True, server_default=func.now()
+    )
     
     # Relationships
     company: Mapped[Optional["Company"]] = relationship("Company", back_populates="audit_logs")
@@ -270,5 +317,79 @@ class AuditLog(Base, TimestampMixin):
         Index("idx_audit_logs_company_date", "company_id", "created_at"),
         Index("idx_audit_logs_user_date", "user_id", "created_at"),
         Index("idx_audit_logs_resource", "resource_type", "resource_id"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
     )
 
+
+# Catches rows outside the monthly partitions that audit_service creates ahead of time
+event.listen(
+    AuditLog.__table__,
+    "after_create",
+    DDL("CREATE TABLE IF NOT EXISTS audit_logs_default PARTITION OF audit_logs DEFAULT")
+)
+
+
+# Mirrors the unread-counter trigger in database/schema.sql for databases built
+# through create_all; transition tables need one trigger per event
+_UNREAD_COUNT_DDL = (
+    """
+CREATE OR REPLACE FUNCTION maintain_unread_notification_count()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Statement-level: one UPDATE per affected user, however many rows changed
+    IF TG_OP = 'INSERT' THEN
+        UPDATE users
+        SET unread_notification_count = users.unread_notification_count + delta.unread
+        FROM (
+            SELECT user_id, count(*) AS unread FROM new_rows
+            WHERE NOT COALESCE(is_read, FALSE) GROUP BY user_id
+        ) AS delta
+        WHERE users.id = delta.user_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE users
+        SET unread_notification_count = users.unread_notification_count - delta.unread
+        FROM (
+            SELECT user_id, count(*) AS unread FROM old_rows
+            WHERE NOT COALESCE(is_read, FALSE) GROUP BY user_id
+        ) AS delta
+        WHERE users.id = delta.user_id;
+    ELSE
+        UPDATE users
+        SET unread_notification_count = users.unread_notification_count + delta.unread
+        FROM (
+            SELECT user_id, sum(change) AS unread FROM (
+                SELECT user_id, 1 AS change FROM new_rows WHERE NOT COALESCE(is_read, FALSE)
+                UNION ALL
+                SELECT user_id, -1 FROM old_rows WHERE NOT COALESCE(is_read, FALSE)
+            ) AS changes
+            GROUP BY user_id
+            HAVING sum(change) <> 0
+        ) AS delta
+        WHERE users.id = delta.user_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+""",
+    """
+CREATE TRIGGER maintain_notifications_unread_count_insert AFTER INSERT ON notifications
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_unread_notification_count();
+""",
+    """
+CREATE TRIGGER maintain_notifications_unread_count_delete AFTER DELETE ON notifications
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_unread_notification_count();
+""",
+    """
+CREATE TRIGGER maintain_notifications_unread_count_update AFTER UPDATE ON notifications
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_unread_notification_count();
+""",
+)
+for _statement in _UNREAD_COUNT_DDL:
+    event.listen(Notification.__table__, "after_create", DDL(_statement))
+
+
+# Resolve relationships now rather than on the first query
+Base.registry.configure()
@@ -0,0 +1,150 @@
+"""
+Pagination utilities for the Expense Management System.
+Encodes and decodes opaque keyset cursors used by list endpoints.
+"""
+
+import base64
+import binascii
+from datetime import datetime
+from typing import Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Above this many (estimated) rows, totals come from the planner instead of COUNT(*)
+EXACT_COUNT_THRESHOLD = 10_000
+
+
+def encode_cursor(sort_value: datetime, row_id: UUID) -> str:
+    """
+    Encode the last-seen sort key of a page into an opaque cursor.
+
+    Args:
+        sort_value: Timestamp of the last row on the page
+        row_id: ID of the last row on the page (tie-breaker)
+
+    Returns:
+        str: URL-safe base64 cursor
+    """
+    raw = f"{sort_value.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """
+    Decode an opaque cursor back into its sort key.
+
+    Args:
+        cursor: Cursor previously returned by encode_cursor
+
+    Returns:
+        Tuple[datetime, UUID]: Timestamp and row ID of the last-seen row
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        sort_value, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(sort_value), UUID(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def parse_cursor_param(cursor: Optional[str]) -> Optional[Tuple[datetime, UUID]]:
+    """
+    Decode a ``cursor`` query parameter, rejecting malformed values.
+
+    Args:
+        cursor: Raw cursor query parameter (may be empty)
+
+    Returns:
+        Optional[Tuple[datetime, UUID]]: Decoded sort key, or None if no cursor was given
+
+    Raises:
+        HTTPException: If the cursor is malformed
+    """
+    if not cursor:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+
+def next_cursor_for(rows: list, limit: int, sort_attr: str) -> Tuple[list, Optional[str]]:
+    """
+    Trim a page fetched with ``limit + 1`` rows and build its next cursor.
+
+    Args:
+        rows: Rows fetched from the database (up to limit + 1)
+        limit: Requested page size
+        sort_attr: Name of the timestamp attribute used for ordering
+
+    Returns:
+        Tuple[list, Optional[str]]: Page rows and the cursor for the next page
+    """
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, sort_attr), last.id)
+
+
+async def estimate_count(db: AsyncSession, stmt: Select) -> int:
+    """
+    Estimate the number of rows a query returns from the planner's statistics.
+
+    Args:
+        db: Database session
+        stmt: Query to estimate (binds must be server-generated values)
+
+    Returns:
+        int: Planner row estimate for the top plan node
+    """
+    compiled = stmt.compile(dialect=db.bind.dialect, compile_kwargs={"literal_binds": True})
+    result = await db.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}"))
+    plan = result.scalar()
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def exact_count(db: AsyncSession, stmt: Select) -> int:
+    """
+    Count the rows of a query with ``SELECT count(*) FROM (<stmt>)``.
+
+    Args:
+        db: Database session
+        stmt: Query whose rows should be counted; select only a key column
+
+    Returns:
+        int: Exact row count
+    """
+    result = await db.execute(select(func.count()).select_from(stmt.subquery()))
+    return result.scalar() or 0
+
+
+async def count_rows(db: AsyncSession, stmt: Select) -> Tuple[int, bool]:
+    """
+    Count the rows of a query, falling back to an estimate for large results.
+
+    Exact counts are only run when the planner expects at most
+    EXACT_COUNT_THRESHOLD rows, so large tenants never pay for a full scan.
+
+    Args:
+        db: Database session
+        stmt: Query whose rows should be counted
+
+    Returns:
+        Tuple[int, bool]: Row count and whether it is an estimate
+    """
+    estimate = await estimate_count(db, stmt)
+    if estimate > EXACT_COUNT_THRESHOLD:
+        return estimate, True
+
+    return await exact_count(db, stmt), False
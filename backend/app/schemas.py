@@ -8,7 +8,7 @@ from decimal import Decimal
 from typing import Optional, List, Dict, Any
 from uuid import UUID
 
-from pydantic import BaseModel, Field, EmailStr, validator, ConfigDict
+from pydantic import AliasChoices, BaseModel, Field, EmailStr, validator, ConfigDict
 from enum import Enum
 
 
@@ -69,7 +69,6 @@ class BaseSchema(BaseModel):
     """Base schema with common configuration."""
     model_config = ConfigDict(
         from_attributes=True,
-        validate_assignment=True,
         arbitrary_types_allowed=True
     )
 
@@ -367,7 +366,10 @@ class NotificationBase(BaseSchema):
     type: NotificationType
     title: str = Field(..., min_length=1, max_length=255)
     message: str = Field(..., min_length=1)
-    metadata: Optional[Dict[str, Any]] = None
+    # ORM rows expose the column as ``meta``; API payloads keep ``metadata``
+    metadata: Optional[Dict[str, Any]] = Field(
+        None, validation_alias=AliasChoices("meta", "metadata")
+    )
 
 
 class NotificationCreate(NotificationBase):
@@ -420,6 +422,7 @@ class FileUploadResponse(BaseSchema):
     url: str
     size: int
     content_type: str
+    sha256: str
 
 
 # Report schemas
@@ -465,10 +468,12 @@ class PaginationParams(BaseSchema):
 class PaginatedResponse(BaseSchema):
     """Schema for paginated responses."""
     items: List[Any]
-    total: int
-    page: int
+    total: Optional[int] = None
+    total_is_estimate: Optional[bool] = None
+    page: Optional[int] = None
     size: int
-    pages: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 # Update forward references
@@ -7,9 +7,11 @@ import logging
 from datetime import datetime, timedelta
 from decimal import Decimal
 from typing import List, Dict, Any, Optional, Tuple
+from uuid import UUID
 
+from fastapi import BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_, func, update
+from sqlalchemy import select, and_, or_, func, update, insert, tuple_
 from sqlalchemy.orm import selectinload
 
 from app.models import (
@@ -17,8 +19,11 @@ from app.models import (
     Notification, AuditLog, ExpenseStatus, ApprovalStatus, ApprovalType
 )
 from app.schemas import AuditAction, NotificationType
+from app.cache import cache_get_or_set
+from app.pagination import count_rows, next_cursor_for
 from app.services.notification_service import notification_service
 from app.services.audit_service import audit_service
+from config import settings
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +42,10 @@ class ApprovalService:
         """
         Create approval workflow for an expense based on rules.
         
+        Runs in the caller's transaction: approvals, notifications and the
+        audit entry are written when the caller commits, and errors propagate
+        so the caller can roll the whole submission back.
+        
         Args:
             expense: The expense to create workflow for
             db: Database session
@@ -56,6 +65,7 @@ class ApprovalService:
             approval_rules.sort(key=lambda x: x.order_index)
             
             approvals = []
+            notifications = []
             
             # Create approval records based on rules
             for rule in approval_rules:
@@ -77,22 +87,22 @@ class ApprovalService:
                 db.add(approval)
                 approvals.append(approval)
                 
-                # Send notification to approver
-                await notification_service.create_notification(
-                    user_id=rule.user_id,
-                    type=NotificationType.expense_submitted,
-                    title="New Expense Approval Required",
-                    message=f"Expense '{expense.description}' requires your approval",
-                    metadata={
+                # Queue notification to approver
+                notifications.append({
+                    "user_id": rule.user_id,
+                    "type": NotificationType.expense_submitted,
+                    "title": "New Expense Approval Required",
+                    "message": f"Expense '{expense.description}' requires your approval",
+                    "metadata": {
                         "expense_id": str(expense.id),
                         "approval_type": rule.approval_type.value,
                         "amount": float(expense.amount),
                         "currency": expense.currency
-                    },
-                    db=db
-                )
+                    }
+                })
             
-            await db.commit()
+            # Notify all approvers in one batch
+            await notification_service.create_notifications_bulk(notifications, db)
             
             # Log audit trail
             await audit_service.log_action(
@@ -103,7 +113,7 @@ class ApprovalService:
                 resource_id=expense.id,
                 new_values={
                     "approval_count": len(approvals),
-                    "rules_applied": [rule.id for rule in approval_rules]
+                    "rules_applied": [str(rule.id) for rule in approval_rules]
                 },
                 db=db
             )
@@ -113,16 +123,16 @@ class ApprovalService:
             
         except Exception as e:
             logger.error(f"Error creating approval workflow: {e}")
-            await db.rollback()
-            return []
+            raise
     
     async def process_approval(
         self,
-        approval_id: str,
+        approval_id: UUID,
         status: ApprovalStatus,
         comments: Optional[str],
         approver: User,
-        db: AsyncSession
+        db: AsyncSession,
+        background_tasks: Optional[BackgroundTasks] = None
     ) -> Tuple[bool, Optional[str]]:
         """
         Process an individual approval decision.
@@ -133,6 +143,7 @@ class ApprovalService:
             comments: Optional comments from approver
             approver: User making the approval decision
             db: Database session
+            background_tasks: If given, the submitter notification is sent after the response
             
         Returns:
             Tuple[bool, Optional[str]]: Success status and error message
@@ -182,7 +193,7 @@ class ApprovalService:
             await db.commit()
             
             # Send notification to expense submitter
-            await notification_service.create_notification(
+            notification = dict(
                 user_id=approval.expense.user_id,
                 type=NotificationType.expense_approved if status == ApprovalStatus.approved else NotificationType.expense_rejected,
                 title=f"Expense {'Approved' if status == ApprovalStatus.approved else 'Rejected'}",
@@ -191,9 +202,12 @@ class ApprovalService:
                     "expense_id": str(approval.expense.id),
                     "approver": f"{approver.first_name} {approver.last_name}",
                     "comments": comments
-                },
-                db=db
+                }
             )
+            if background_tasks is not None:
+                background_tasks.add_task(notification_service.create_notification_standalone, **notification)
+            else:
+                await notification_service.create_notification(db=db, **notification)
             
             logger.info(f"Processed approval {approval_id} with status {status.value}")
             return True, None
@@ -203,6 +217,111 @@ class ApprovalService:
             await db.rollback()
             return False, str(e)
     
+    async def process_bulk(
+        self,
+        approval_ids: List[UUID],
+        status: ApprovalStatus,
+        comments: Optional[str],
+        approver: User,
+        db: AsyncSession
+    ) -> Dict[UUID, Optional[str]]:
+        """
+        Process several approval decisions in a single transaction.
+        
+        Args:
+            approval_ids: IDs of the approvals to process
+            status: Approval status (approved/rejected)
+            comments: Optional comments from approver
+            approver: User making the approval decision
+            db: Database session
+            
+        Returns:
+            Dict[UUID, Optional[str]]: Error message per requested ID (None on success)
+        """
+        try:
+            approved_at = datetime.utcnow()
+            
+            # Permission and state checks are part of the UPDATE predicate
+            result = await db.execute(
+                update(Approval)
+                .where(
+                    Approval.id.in_(approval_ids),
+                    Approval.approver_id == approver.id,
+                    Approval.status == ApprovalStatus.pending
+                )
+                .values(status=status, comments=comments, approved_at=approved_at)
+                .returning(Approval.id, Approval.expense_id)
+            )
+            processed = result.all()
+            
+            if not processed:
+                return {approval_id: "Approval not found, access denied or already processed" for approval_id in approval_ids}
+            
+            # Log audit trail in one multi-row insert
+            action = AuditAction.approve if status == ApprovalStatus.approved else AuditAction.reject
+            await db.execute(
+                insert(AuditLog),
+                [
+                    {
+                        "company_id": approver.company_id,
+                        "user_id": approver.id,
+                        "action": action,
+                        "resource_type": "approval",
+                        "resource_id": row.id,
+                        "old_values": {"status": ApprovalStatus.pending.value},
+                        "new_values": {
+                            "status": status.value,
+                            "comments": comments,
+                            "approved_at": approved_at.isoformat()
+                        }
+                    }
+                    for row in processed
+                ]
+            )
+            
+            # Recalculate status of every affected expense
+            result = await db.execute(
+                select(Expense).where(Expense.id.in_({row.expense_id for row in processed}))
+            )
+            expenses = result.scalars().all()
+            
+            for expense in expenses:
+                expense.status = await self._calculate_expense_status(expense, db)
+            
+            await db.commit()
+            
+        except Exception as e:
+            logger.error(f"Error processing bulk approval: {e}")
+            await db.rollback()
+            return {approval_id: str(e) for approval_id in approval_ids}
+        
+        # Notify expense submitters once the decisions are committed
+        for expense in expenses:
+            try:
+                await notification_service.create_notification(
+                    user_id=expense.user_id,
+                    type=NotificationType.expense_approved if status == ApprovalStatus.approved else NotificationType.expense_rejected,
+                    title=f"Expense {'Approved' if status == ApprovalStatus.approved else 'Rejected'}",
+                    message=f"Your expense '{expense.description}' has been {status.value}",
+                    metadata={
+                        "expense_id": str(expense.id),
+                        "approver": f"{approver.first_name} {approver.last_name}",
+                        "comments": comments
+                    },
+                    db=db
+                )
+            except Exception as e:
+                logger.error(f"Error sending notification for expense {expense.id}: {e}")
+        
+        processed_ids = {row.id for row in processed}
+        logger.info(f"Processed {len(processed_ids)}/{len(approval_ids)} approvals with status {status.value}")
+        
+        return {
+            approval_id: None if approval_id in processed_ids
+            else "Approval not found, access denied or already processed"
+            for approval_id in approval_ids
+        }
+    
     async def _calculate_expense_status(self, expense: Expense, db: AsyncSession) -> ExpenseStatus:
         """
         Calculate the overall status of an expense based on all approvals.
@@ -279,112 +398,183 @@ class ApprovalService:
             logger.error(f"Error calculating expense status: {e}")
             return ExpenseStatus.pending
     
-    async def get_pending_approvals(
+    def _pending_filter(self, approver: User):
+        """Filter clause for an approver's pending approvals."""
+        return and_(
+            Approval.approver_id == approver.id,
+            Approval.status == ApprovalStatus.pending
+        )
+    
+    def _history_filter(self, approver: User):
+        """Filter clause for an approver's processed approvals."""
+        # History is keyset-paged on approved_at, so rows without one cannot be paged
+        return and_(
+            Approval.approver_id == approver.id,
+            Approval.status != ApprovalStatus.pending,
+            Approval.approved_at.isnot(None)
+        )
+    
+    async def get_pending_page(
         self,
         approver: User,
         db: AsyncSession,
         limit: int = 50,
-        offset: int = 0
-    ) -> Tuple[List[Approval], int]:
+        offset: int = 0,
+        cursor: Optional[Tuple[datetime, UUID]] = None
+    ) -> Tuple[List[Approval], Optional[str]]:
         """
-        Get pending approvals for a specific approver.
+        Get one page of pending approvals for a specific approver.
         
         Args:
             approver: The approver user
             db: Database session
             limit: Maximum number of results
-            offset: Offset for pagination
+            offset: Offset for pagination (ignored when cursor is given)
+            cursor: Decoded ``(created_at, id)`` of the last-seen row
             
         Returns:
-            Tuple[List[Approval], int]: List of approvals and total count
+            Tuple[List[Approval], Optional[str]]: List of approvals and next page cursor
         """
         try:
-            # Get pending approvals for this approver
-            query = (
-                select(Approval)
-                .where(
-                    and_(
-                        Approval.approver_id == approver.id,
-                        Approval.status == ApprovalStatus.pending
-                    )
-                )
-                .options(
-                    selectinload(Approval.expense).selectinload(Expense.user),
-                    selectinload(Approval.expense).selectinload(Expense.category)
-                )
-                .order_by(Approval.created_at.desc())
+            return await self._fetch_approval_page(
+                self._pending_filter(approver), "created_at", db, limit, offset, cursor
             )
             
-            # Get total count
-            count_result = await db.execute(
-                select(func.count(Approval.id)).where(
-                    and_(
-                        Approval.approver_id == approver.id,
-                        Approval.status == ApprovalStatus.pending
-                    )
-                )
-            )
-            total_count = count_result.scalar()
-            
-            # Get paginated results
-            result = await db.execute(query.offset(offset).limit(limit))
-            approvals = result.scalars().all()
+        except Exception as e:
+            logger.error(f"Error getting pending approvals: {e}")
+            return [], None
+    
+    async def count_pending(self, approver: User, db: AsyncSession) -> Tuple[int, bool]:
+        """
+        Count pending approvals for a specific approver.
+        
+        Large results are estimated from planner statistics rather than counted.
+        
+        Args:
+            approver: The approver user
+            db: Database session
             
-            return approvals, total_count
+        Returns:
+            Tuple[int, bool]: Number of pending approvals and whether it is an estimate
+        """
+        try:
+            return await count_rows(db, select(Approval.id).where(self._pending_filter(approver)))
             
         except Exception as e:
-            logger.error(f"Error getting pending approvals: {e}")
-            return [], 0
+            logger.error(f"Error counting pending approvals: {e}")
+            return 0, False
     
-    async def get_approval_history(
+    async def get_history_page(
         self,
         approver: User,
         db: AsyncSession,
         limit: int = 50,
-        offset: int = 0
-    ) -> Tuple[List[Approval], int]:
+        offset: int = 0,
+        cursor: Optional[Tuple[datetime, UUID]] = None
+    ) -> Tuple[List[Approval], Optional[str]]:
         """
-        Get approval history for a specific approver.
+        Get one page of approval history for a specific approver.
+        
+        History is ordered by decision time, so the keyset cursor encodes
+        ``(approved_at, id)`` of the last-seen row.
         
         Args:
             approver: The approver user
             db: Database session
             limit: Maximum number of results
-            offset: Offset for pagination
+            offset: Offset for pagination (ignored when cursor is given)
+            cursor: Decoded ``(approved_at, id)`` of the last-seen row
             
         Returns:
-            Tuple[List[Approval], int]: List of approvals and total count
+            Tuple[List[Approval], Optional[str]]: List of approvals and next page cursor
         """
         try:
-            # Get approval history for this approver
-            query = (
-                select(Approval)
-                .where(Approval.approver_id == approver.id)
-                .where(Approval.status != ApprovalStatus.pending)
-                .options(
-                    selectinload(Approval.expense).selectinload(Expense.user),
-                    selectinload(Approval.expense).selectinload(Expense.category)
-                )
-                .order_by(Approval.approved_at.desc())
-            )
-            
-            # Get total count
-            count_result = await db.execute(
-                select(func.count(Approval.id))
-                .where(Approval.approver_id == approver.id)
-                .where(Approval.status != ApprovalStatus.pending)
+            return await self._fetch_approval_page(
+                self._history_filter(approver), "approved_at", db, limit, offset, cursor
             )
-            total_count = count_result.scalar()
             
-            # Get paginated results
-            result = await db.execute(query.offset(offset).limit(limit))
-            approvals = result.scalars().all()
+        except Exception as e:
+            logger.error(f"Error getting approval history: {e}")
+            return [], None
+    
+    async def count_history(self, approver: User, db: AsyncSession) -> Tuple[int, bool]:
+        """
+        Count processed approvals for a specific approver.
+        
+        Large results are estimated from planner statistics rather than counted.
+        
+        Args:
+            approver: The approver user
+            db: Database session
             
-            return approvals, total_count
+        Returns:
+            Tuple[int, bool]: Number of approved or rejected approvals and whether it is an estimate
+        """
+        try:
+            return await count_rows(db, select(Approval.id).where(self._history_filter(approver)))
             
         except Exception as e:
-            logger.error(f"Error getting approval history: {e}")
-            return [], 0
+            logger.error(f"Error counting approval history: {e}")
+            return 0, False
+    
+    async def _fetch_approval_page(
+        self,
+        filters,
+        sort_attr: str,
+        db: AsyncSession,
+        limit: int,
+        offset: int,
+        cursor: Optional[Tuple[datetime, UUID]]
+    ) -> Tuple[List[Approval], Optional[str]]:
+        """
+        Fetch one page of approvals ordered by ``sort_attr`` descending.
+        
+        Keyset mode seeks past the cursor directly. Offset mode uses a deferred
+        join: the offset is applied to a narrow ``SELECT id`` subquery so only
+        the rows on the page are materialized and joined back.
+        
+        Args:
+            filters: Filter clause for the approvals
+            sort_attr: Timestamp attribute to order by
+            db: Database session
+            limit: Maximum number of results
+            offset: Offset for pagination (ignored when cursor is given)
+            cursor: Decoded ``(sort value, id)`` of the last-seen row
+            
+        Returns:
+            Tuple[List[Approval], Optional[str]]: Page of approvals and next cursor
+        """
+        sort_column = getattr(Approval, sort_attr)
+        ordering = (sort_column.desc(), Approval.id.desc())
+        
+        if cursor:
+            query = (
+                select(Approval)
+                .where(filters, tuple_(sort_column, Approval.id) < tuple_(*cursor))
+            )
+        else:
+            page_ids = (
+                select(Approval.id)
+                .where(filters)
+                .order_by(*ordering)
+                .offset(offset)
+                .limit(limit + 1)
+                .subquery()
+            )
+            query = select(Approval).join(page_ids, Approval.id == page_ids.c.id)
+        
+        # Fetch one extra row to know whether another page exists
+        result = await db.execute(
+            query
+            .options(
+                selectinload(Approval.expense).selectinload(Expense.user),
+                selectinload(Approval.expense).selectinload(Expense.category),
+                selectinload(Approval.approver)
+            )
+            .order_by(*ordering)
+            .limit(limit + 1)
+        )
+        return next_cursor_for(result.scalars().all(), limit, sort_attr)
     
     async def check_overdue_approvals(self, db: AsyncSession) -> List[Approval]:
         """
@@ -480,64 +670,19 @@ class ApprovalService:
         Returns:
             Dict[str, Any]: Approval statistics
         """
+        key = (
+            f"stats:approvals:{approver.company_id}:{approver.id}:"
+            f"{start_date.isoformat() if start_date else ''}:"
+            f"{end_date.isoformat() if end_date else ''}"
+        )
+        
         try:
-            # Build date filter
-            date_filter = and_(
-                Approval.approver_id == approver.id
+            return await cache_get_or_set(
+                key,
+                ttl=settings.stats_cache_ttl,
+                loader=lambda: self._compute_approval_statistics(approver, db, start_date, end_date)
             )
             
-            if start_date:
-                date_filter = and_(date_filter, Approval.created_at >= start_date)
-            if end_date:
-                date_filter = and_(date_filter, Approval.created_at <= end_date)
-            
-            # Get approval counts by status
-            result = await db.execute(
-                select(
-                    Approval.status,
-                    func.count(Approval.id).label('count')
-                )
-                .where(date_filter)
-                .group_by(Approval.status)
-            )
-            
-            status_counts = {row.status.value: row.count for row in result}
-            
-            # Get total pending approvals
-            pending_result = await db.execute(
-                select(func.count(Approval.id))
-                .where(
-                    and_(
-                        Approval.approver_id == approver.id,
-                        Approval.status == ApprovalStatus.pending
-                    )
-                )
-            )
-            total_pending = pending_result.scalar()
-            
-            # Get average approval time
-            avg_time_result = await db.execute(
-                select(func.avg(
-                    func.extract('epoch', Approval.approved_at - Approval.created_at)
-                ))
-                .where(
-                    and_(
-                        Approval.approver_id == approver.id,
-                        Approval.status != ApprovalStatus.pending,
-                        Approval.approved_at.isnot(None)
-                    )
-                )
-            )
-            avg_approval_time_hours = avg_time_result.scalar() or 0
-            
-            return {
-                "total_processed": sum(status_counts.values()),
-                "pending": total_pending,
-                "approved": status_counts.get(ApprovalStatus.approved.value, 0),
-                "rejected": status_counts.get(ApprovalStatus.rejected.value, 0),
-                "average_approval_time_hours": round(avg_approval_time_hours / 3600, 2)
-            }
-            
         except Exception as e:
             logger.error(f"Error getting approval statistics: {e}")
             return {
@@ -547,6 +692,71 @@ class ApprovalService:
                 "rejected": 0,
                 "average_approval_time_hours": 0
             }
+    
+    async def _compute_approval_statistics(
+        self,
+        approver: User,
+        db: AsyncSession,
+        start_date: Optional[datetime],
+        end_date: Optional[datetime]
+    ) -> Dict[str, Any]:
+        """Run the statistics aggregation queries for an approver."""
+        # Build date filter
+        date_filter = and_(
+            Approval.approver_id == approver.id
+        )
+        
+        if start_date:
+            date_filter = and_(date_filter, Approval.created_at >= start_date)
+        if end_date:
+            date_filter = and_(date_filter, Approval.created_at <= end_date)
+        
+        # Get approval counts by status
+        result = await db.execute(
+            select(
+                Approval.status,
+                func.count(Approval.id).label('count')
+            )
+            .where(date_filter)
+            .group_by(Approval.status)
+        )
+        
+        status_counts = {row.status.value: row.count for row in result}
+        
+        # Get total pending approvals
+        pending_result = await db.execute(
+            select(func.count(Approval.id))
+            .where(
+                and_(
+                    Approval.approver_id == approver.id,
+                    Approval.status == ApprovalStatus.pending
+                )
+            )
+        )
+        total_pending = pending_result.scalar()
+        
+        # Get average approval time
+        avg_time_result = await db.execute(
+            select(func.avg(
+                func.extract('epoch', Approval.approved_at - Approval.created_at)
+            ))
+            .where(
+                and_(
+                    Approval.approver_id == approver.id,
+                    Approval.status != ApprovalStatus.pending,
+                    Approval.approved_at.isnot(None)
+                )
+            )
+        )
+        avg_approval_time_hours = avg_time_result.scalar() or 0
+        
+        return {
+            "total_processed": sum(status_counts.values()),
+            "pending": total_pending,
+            "approved": status_counts.get(ApprovalStatus.approved.value, 0),
+            "rejected": status_counts.get(ApprovalStatus.rejected.value, 0),
+            "average_approval_time_hours": round(float(avg_approval_time_hours) / 3600, 2)
+        }
 
 
 # Global approval service instance
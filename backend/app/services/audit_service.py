@@ -3,34 +3,60 @@ Audit logging service for the Expense Management System.
 Handles comprehensive audit trails for all system actions and compliance.
 """
 
+import asyncio
+import csv
+import io
+import json
 import logging
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import Optional, Dict, Any, List
 from uuid import UUID
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_, func, desc
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, insert, and_, or_, func, desc, text
+from sqlalchemy.orm import selectinload, undefer
 
+from app.database import AsyncSessionLocal
+from app.ids import uuid7
 from app.models import AuditLog, User, Company
 from app.schemas import AuditAction, AuditLogCreate
 
 logger = logging.getLogger(__name__)
 
+# Queued by stop_writer; the writer flushes its current batch and exits when it sees it
+_STOP = object()
+
+# Monthly audit_logs partitions are named audit_logs_yYYYYmMM
+PARTITION_NAME_FORMAT = "audit_logs_y%Ym%m"
+
+
+def _month_start(day: date, months: int = 0) -> date:
+    """First day of the month ``months`` after the month containing ``day``."""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
 
 class AuditService:
     """Service for managing audit logs and compliance tracking."""
     
     def __init__(self):
         self.retention_days = 365  # Keep audit logs for 1 year
+        self.batch_size = 500
+        self.flush_interval = 0.2  # seconds
+        self.copy_threshold = 50  # batches this large are written with COPY
+        self.flush_retries = 3
+        self.retry_delay = 0.5  # seconds, doubled after each failed attempt
+        self.stop_timeout = 10.0  # seconds to wait for the writer before cancelling it
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=10000)
+        self._writer: Optional[asyncio.Task] = None
     
     async def log_action(
         self,
-        company_id: Optional[str],
-        user_id: Optional[str],
+        company_id: Optional[UUID],
+        user_id: Optional[UUID],
         action: AuditAction,
         resource_type: str,
-        resource_id: Optional[str] = None,
+        resource_id: Optional[UUID] = None,
         old_values: Optional[Dict[str, Any]] = None,
         new_values: Optional[Dict[str, Any]] = None,
         ip_address: Optional[str] = None,
@@ -38,7 +64,10 @@ class AuditService:
         db: AsyncSession = None
     ) -> AuditLog:
         """
-        Log an audit action.
+        Log an audit action as part of the caller's transaction.
+        
+        The entry is only added to the session; it is written when the
+        caller commits, atomically with the change being audited.
         
         Args:
             company_id: Company ID (optional)
@@ -69,17 +98,185 @@ class AuditService:
             )
             
             db.add(audit_log)
-            await db.commit()
-            await db.refresh(audit_log)
             
             logger.debug(f"Logged audit action: {action.value} on {resource_type}")
             return audit_log
             
         except Exception as e:
             logger.error(f"Error logging audit action: {e}")
-            await db.rollback()
             raise
     
+    def enqueue(
+        self,
+        company_id: Optional[UUID],
+        user_id: Optional[UUID],
+        action: AuditAction,
+        resource_type: str,
+        resource_id: Optional[UUID] = None,
+        old_values: Optional[Dict[str, Any]] = None,
+        new_values: Optional[Dict[str, Any]] = None,
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None
+    ) -> None:
+        """
+        Queue an audit action for the background batch writer.
+        
+        The entry is written within ``flush_interval`` seconds and flushed on
+        clean shutdown; entries still queued when the process dies are lost.
+        
+        Args:
+            company_id: Company ID (optional)
+            user_id: User ID (optional)
+            action: Type of action performed
+            resource_type: Type of resource affected
+            resource_id: ID of the resource affected
+            old_values: Previous values (for updates)
+            new_values: New values (for creates/updates)
+            ip_address: Client IP address
+            user_agent: Client user agent
+        """
+        try:
+            self._queue.put_nowait({
+                "company_id": company_id,
+                "user_id": user_id,
+                "action": action,
+                "resource_type": resource_type,
+                "resource_id": resource_id,
+                "old_values": old_values or {},
+                "new_values": new_values or {},
+                "ip_address": ip_address,
+                "user_agent": user_agent
+            })
+        except asyncio.QueueFull:
+            logger.error(f"Audit queue full, dropping {action.value} on {resource_type}")
+    
+    def start_writer(self) -> None:
+        """Start the background task that flushes queued audit entries."""
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._run_writer())
+    
+    async def stop_writer(self) -> None:
+        """
+        Stop the background writer and flush any remaining entries.
+        
+        The writer is asked to stop through the queue, so it first flushes
+        the batch it is collecting. It is only cancelled if it does not
+        finish within ``stop_timeout`` seconds.
+        """
+        if self._writer is not None:
+            try:
+                await asyncio.wait_for(self._queue.put(_STOP), self.stop_timeout)
+                await asyncio.wait_for(asyncio.shield(self._writer), self.stop_timeout)
+            except asyncio.TimeoutError:
+                logger.error("Audit writer did not stop in time, cancelling it")
+                self._writer.cancel()
+                try:
+                    await self._writer
+                except asyncio.CancelledError:
+                    pass
+            self._writer = None
+        
+        while not self._queue.empty():
+            await self._flush(self._drain_nowait())
+    
+    async def _run_writer(self) -> None:
+        """Collect queued entries into batches and insert them until stopped."""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            entry = await self._queue.get()
+            if entry is _STOP:
+                return
+            
+            batch = [entry]
+            deadline = loop.time() + self.flush_interval
+            stopping = False
+            
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if entry is _STOP:
+                    stopping = True
+                    break
+                batch.append(entry)
+            
+            await self._flush(batch)
+            if stopping:
+                return
+    
+    def _drain_nowait(self) -> List[Dict[str, Any]]:
+        """Take up to batch_size entries from the queue without waiting."""
+        batch = []
+        while len(batch) < self.batch_size and not self._queue.empty():
+            entry = self._queue.get_nowait()
+            if entry is not _STOP:
+                batch.append(entry)
+        return batch
+    
+    async def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        """
+        Insert a batch of audit entries with COPY, or one multi-row INSERT if small.
+        
+        Failed writes are retried with exponential backoff; the batch is only
+        dropped, and logged as such, after ``flush_retries`` attempts.
+        """
+        if not batch:
+            return
+        
+        delay = self.retry_delay
+        for attempt in range(1, self.flush_retries + 1):
+            try:
+                async with AsyncSessionLocal() as db:
+                    if len(batch) >= self.copy_threshold:
+                        await self._copy_batch(batch, db)
+                    else:
+                        await db.execute(insert(AuditLog), batch)
+                    await db.commit()
+                
+                logger.debug(f"Flushed {len(batch)} audit entries")
+                return
+                
+            except Exception as e:
+                if attempt == self.flush_retries:
+                    logger.error(f"Dropping {len(batch)} audit entries after {attempt} failed flushes: {e}")
+                    return
+                logger.warning(f"Error flushing {len(batch)} audit entries (attempt {attempt}), retrying: {e}")
+                await asyncio.sleep(delay)
+                delay *= 2
+    
+    async def _copy_batch(self, batch: List[Dict[str, Any]], db: AsyncSession) -> None:
+        """Stream a batch of audit entries into audit_logs with asyncpg COPY."""
+        connection = await db.connection()
+        raw = await connection.get_raw_connection()
+        
+        await raw.driver_connection.copy_records_to_table(
+            AuditLog.__tablename__,
+            records=[
+                (
+                    uuid7(),
+                    entry["company_id"],
+                    entry["user_id"],
+                    entry["action"].value,
+                    entry["resource_type"],
+                    entry["resource_id"],
+                    json.dumps(entry["old_values"], default=str),
+                    json.dumps(entry["new_values"], default=str),
+                    entry["ip_address"],
+                    entry["user_agent"]
+                )
+                for entry in batch
+            ],
+            columns=[
+                "id", "company_id", "user_id", "action", "resource_type", "resource_id",
+                "old_values", "new_values", "ip_address", "user_agent"
+            ]
+        )
+    
     async def get_audit_logs(
         self,
         company_id: Optional[str] = None,
@@ -91,7 +288,8 @@ class AuditService:
         end_date: Optional[datetime] = None,
         db: AsyncSession = None,
         limit: int = 100,
-        offset: int = 0
+        offset: int = 0,
+        include_values: bool = False
     ) -> tuple[List[AuditLog], int]:
         """
         Get audit logs with filtering options.
@@ -107,6 +305,7 @@ class AuditService:
             db: Database session
             limit: Maximum number of results
             offset: Offset for pagination
+            include_values: Also load the old/new value payloads
             
         Returns:
             tuple[List[AuditLog], int]: Audit logs and total count
@@ -151,6 +350,9 @@ class AuditService:
             count_result = await db.execute(count_query)
             total_count = count_result.scalar()
             
+            if include_values:
+                query = query.options(undefer(AuditLog.old_values, AuditLog.new_values))
+            
             # Get paginated results
             result = await db.execute(
                 query.offset(offset).limit(limit)
@@ -244,6 +446,7 @@ class AuditService:
                 .order_by(desc(AuditLog.created_at))
                 .limit(limit)
                 .options(
+                    undefer(AuditLog.old_values, AuditLog.new_values),
                     selectinload(AuditLog.user),
                     selectinload(AuditLog.company)
                 )
@@ -363,12 +566,16 @@ class AuditService:
         """
         Clean up old audit logs based on retention policy.
         
+        Monthly partitions that lie wholly before the cutoff are dropped, each
+        in its own short transaction; the rest of the boundary month is then
+        deleted row by row.
+        
         Args:
             db: Database session
             days_old: Number of days old (defaults to retention_days)
             
         Returns:
-            int: Number of logs deleted
+            int: Number of logs deleted row by row (rows in dropped partitions are not counted)
         """
         try:
             if days_old is None:
@@ -376,23 +583,18 @@ class AuditService:
             
             cutoff_date = datetime.utcnow() - timedelta(days=days_old)
             
-            # Get count of logs to delete
-            count_result = await db.execute(
-                select(func.count(AuditLog.id))
-                .where(AuditLog.created_at < cutoff_date)
-            )
-            count = count_result.scalar() or 0
+            # Whole months past the cutoff are dropped instead of deleted row by row
+            dropped = await self._drop_expired_partitions(db, cutoff_date.date())
             
-            # Delete old logs
-            if count > 0:
-                await db.execute(
-                    AuditLog.__table__.delete().where(
-                        AuditLog.created_at < cutoff_date
-                    )
+            result = await db.execute(
+                AuditLog.__table__.delete().where(
+                    AuditLog.created_at < cutoff_date
                 )
-                await db.commit()
+            )
+            await db.commit()
+            count = result.rowcount
             
-            logger.info(f"Cleaned up {count} old audit logs")
+            logger.info(f"Cleaned up {count} old audit logs and {dropped} expired partitions")
             return count
             
         except Exception as e:
@@ -400,6 +602,77 @@ class AuditService:
             await db.rollback()
             return 0
     
+    async def ensure_partitions(self, months_ahead: int = 2) -> None:
+        """
+        Create the monthly audit_logs partitions up to ``months_ahead`` months out.
+        
+        Partitions must exist before their month starts: once rows for a month
+        have landed in the default partition, that month's partition can no
+        longer be attached. Each partition is committed on its own, so one
+        failure does not undo the others.
+        
+        Args:
+            months_ahead: Number of months after the current one to create
+        """
+        this_month = _month_start(date.today())
+        
+        async with AsyncSessionLocal() as db:
+            for offset in range(months_ahead + 1):
+                start = _month_start(this_month, offset)
+                end = _month_start(this_month, offset + 1)
+                name = start.strftime(PARTITION_NAME_FORMAT)
+                try:
+                    await db.execute(text(
+                        f"CREATE TABLE IF NOT EXISTS {name} "
+                        f"PARTITION OF {AuditLog.__tablename__} "
+                        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+                    ))
+                    await db.commit()
+                except Exception as e:
+                    logger.error(f"Error creating audit log partition {name}: {e}")
+                    await db.rollback()
+    
+    async def _drop_expired_partitions(self, db: AsyncSession, cutoff: date) -> int:
+        """
+        Drop monthly partitions whose whole range lies before ``cutoff``.
+        
+        Dropping a partition locks audit_logs exclusively, so every drop runs
+        in its own transaction with a short lock_timeout; a drop that cannot
+        get the lock is skipped until the next run instead of stalling writes.
+        
+        Returns:
+            int: Number of partitions dropped
+        """
+        result = await db.execute(text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = CAST(:parent AS regclass)"
+        ), {"parent": AuditLog.__tablename__})
+        names = list(result.scalars())
+        await db.commit()
+        
+        dropped = 0
+        for name in names:
+            try:
+                start = datetime.strptime(name, PARTITION_NAME_FORMAT).date()
+            except ValueError:
+                continue  # the default partition
+            
+            if _month_start(start, 1) > cutoff:
+                continue
+            
+            try:
+                await db.execute(text("SET LOCAL lock_timeout = '2s'"))
+                await db.execute(text(f"DROP TABLE {name}"))
+                await db.commit()
+                dropped += 1
+                logger.info(f"Dropped expired audit log partition {name}")
+            except Exception as e:
+                logger.error(f"Error dropping audit log partition {name}: {e}")
+                await db.rollback()
+        
+        return dropped
+    
     async def export_audit_logs(
         self,
         company_id: str,
@@ -436,6 +709,7 @@ class AuditService:
                 .where(and_(*filters))
                 .order_by(desc(AuditLog.created_at))
                 .options(
+                    undefer(AuditLog.old_values, AuditLog.new_values),
                     selectinload(AuditLog.user),
                     selectinload(AuditLog.company)
                 )
@@ -456,9 +730,6 @@ class AuditService:
     
     def _export_to_csv(self, audit_logs: List[AuditLog]) -> str:
         """Export audit logs to CSV format."""
-        import csv
-        import io
-        
         output = io.StringIO()
         writer = csv.writer(output)
         
@@ -488,8 +759,6 @@ class AuditService:
     
     def _export_to_json(self, audit_logs: List[AuditLog]) -> str:
         """Export audit logs to JSON format."""
-        import json
-        
         data = []
         for log in audit_logs:
             data.append({
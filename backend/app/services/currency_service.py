@@ -7,9 +7,10 @@ import asyncio
 import logging
 from datetime import date, datetime, timedelta
 from decimal import Decimal, ROUND_HALF_UP
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
 
 import httpx
+from cachetools import TTLCache
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_, desc
 
@@ -27,6 +28,8 @@ class CurrencyService:
         self.api_key = settings.exchange_rate_api_key
         self.base_url = settings.exchange_rate_base_url
         self.cache_duration = timedelta(hours=6)  # Cache rates for 6 hours
+        # In-process cache of resolved rates keyed by (from, to, date)
+        self._rate_cache: TTLCache = TTLCache(maxsize=4096, ttl=self.cache_duration.total_seconds())
     
     async def get_exchange_rate(
         self, 
@@ -53,39 +56,59 @@ class CurrencyService:
         if from_currency == to_currency:
             return Decimal('1.0')
         
+        cache_key = (from_currency, to_currency, rate_date)
+        rate = self._rate_cache.get(cache_key)
+        if rate is not None:
+            return rate
+        
+        rate = await self._lookup_rate(from_currency, to_currency, rate_date, db)
+        if rate is not None:
+            self._rate_cache[cache_key] = rate
+            return rate
+        
+        logger.warning(f"No exchange rate found for {from_currency} to {to_currency} on {rate_date}")
+        return None
+    
+    async def _lookup_rate(
+        self,
+        from_currency: str,
+        to_currency: str,
+        rate_date: date,
+        db: Optional[AsyncSession]
+    ) -> Optional[Decimal]:
+        """Resolve a rate from the database, fetching from the API if missing."""
+        if not db:
+            return None
+        
         # Try to get rate from database first
-        if db:
-            rate = await self._get_rate_from_db(db, from_currency, to_currency, rate_date)
-            if rate:
-                return rate
+        rate = await self._get_rate_from_db(db, from_currency, to_currency, rate_date)
+        if rate:
+            return rate
         
         # If not found in DB, try to fetch from API
-        if db:
-            await self._fetch_and_store_rates(db, rate_date)
-            # Try again after fetching
-            rate = await self._get_rate_from_db(db, from_currency, to_currency, rate_date)
-            if rate:
-                return rate
+        await self._fetch_and_store_rates(db, rate_date)
+        # Try again after fetching
+        rate = await self._get_rate_from_db(db, from_currency, to_currency, rate_date)
+        if rate:
+            return rate
         
         # Fallback: try reverse rate
-        if db:
-            reverse_rate = await self._get_rate_from_db(db, to_currency, from_currency, rate_date)
-            if reverse_rate:
-                return Decimal('1.0') / reverse_rate
+        reverse_rate = await self._get_rate_from_db(db, to_currency, from_currency, rate_date)
+        if reverse_rate:
+            return Decimal('1.0') / reverse_rate
         
-        logger.warning(f"No exchange rate found for {from_currency} to {to_currency} on {rate_date}")
         return None
     
-    async def convert_currency(
+    async def get_rate_and_convert(
         self,
         amount: Decimal,
         from_currency: str,
         to_currency: str,
         rate_date: Optional[date] = None,
         db: AsyncSession = None
-    ) -> Optional[Decimal]:
+    ) -> Tuple[Optional[Decimal], Optional[Decimal]]:
         """
-        Convert amount from one currency to another.
+        Look up an exchange rate once and convert an amount with it.
         
         Args:
             amount: Amount to convert
@@ -95,17 +118,44 @@ class CurrencyService:
             db: Database session
             
         Returns:
-            Optional[Decimal]: Converted amount or None if conversion failed
+            Tuple[Optional[Decimal], Optional[Decimal]]: Exchange rate and converted
+            amount, or (None, None) if no rate was found
         """
         if from_currency == to_currency:
-            return amount
+            return Decimal('1.0'), amount
         
         rate = await self.get_exchange_rate(from_currency, to_currency, rate_date, db)
         if rate is None:
-            return None
+            return None, None
         
         converted_amount = amount * rate
-        return converted_amount.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        return rate, converted_amount.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+    
+    async def convert_currency(
+        self,
+        amount: Decimal,
+        from_currency: str,
+        to_currency: str,
+        rate_date: Optional[date] = None,
+        db: AsyncSession = None
+    ) -> Optional[Decimal]:
+        """
+        Convert amount from one currency to another.
+        
+        Args:
+            amount: Amount to convert
+            from_currency: Source currency code
+            to_currency: Target currency code
+            rate_date: Date for conversion (defaults to today)
+            db: Database session
+            
+        Returns:
+            Optional[Decimal]: Converted amount or None if conversion failed
+        """
+        _, converted_amount = await self.get_rate_and_convert(
+            amount, from_currency, to_currency, rate_date, db
+        )
+        return converted_amount
     
     async def get_latest_rates(
         self,
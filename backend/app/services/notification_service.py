@@ -3,23 +3,33 @@ Notification service for the Expense Management System.
 Handles email and in-app notifications for various system events.
 """
 
+import json
 import logging
 import smtplib
 from datetime import datetime, timedelta
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
+from uuid import UUID
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, func, update
+from sqlalchemy import select, insert, and_, func, update, tuple_, text
 from sqlalchemy.orm import selectinload
 
 from config import settings
+from app.cache import cache_get_or_set
+from app.database import AsyncSessionLocal
+from app.ids import uuid7
 from app.models import Notification, User
+from app.pagination import exact_count, next_cursor_for
 from app.schemas import NotificationType, NotificationCreate, NotificationUpdate
+from app.services.notification_stream import channel_for
 
 logger = logging.getLogger(__name__)
 
+# Batches at least this large are inserted with COPY instead of INSERT
+COPY_THRESHOLD = 20
+
 
 class NotificationService:
     """Service for managing system notifications."""
@@ -34,13 +44,14 @@ class NotificationService:
     
     async def create_notification(
         self,
-        user_id: str,
+        user_id: UUID,
         type: NotificationType,
         title: str,
         message: str,
         metadata: Optional[Dict[str, Any]] = None,
         send_email: bool = True,
-        db: AsyncSession = None
+        db: AsyncSession = None,
+        commit: bool = True
     ) -> Notification:
         """
         Create a new notification for a user.
@@ -53,6 +64,7 @@ class NotificationService:
             metadata: Optional metadata for the notification
             send_email: Whether to send email notification
             db: Database session
+            commit: Commit immediately; pass False to join the caller's transaction
             
         Returns:
             Notification: Created notification
@@ -64,12 +76,22 @@ class NotificationService:
                 type=type,
                 title=title,
                 message=message,
-                metadata=metadata or {}
+                meta=metadata or {}
             )
             
             db.add(notification)
-            await db.commit()
-            await db.refresh(notification)
+            await db.flush()
+            
+            # Push to streaming clients; Postgres delivers NOTIFY only on commit
+            payload = json.dumps({
+                "id": str(notification.id),
+                "type": NotificationType(type).value,
+                "title": title
+            })
+            await db.execute(select(func.pg_notify(channel_for(user_id), payload)))
+            
+            if commit:
+                await db.commit()
             
             # Send email if requested and configured
             if send_email and self.smtp_username and self.smtp_password:
@@ -80,17 +102,101 @@ class NotificationService:
             
         except Exception as e:
             logger.error(f"Error creating notification: {e}")
-            await db.rollback()
+            if commit:
+                await db.rollback()
             raise
     
+    async def create_notifications_bulk(
+        self,
+        records: List[Dict[str, Any]],
+        db: AsyncSession,
+        send_email: bool = True
+    ) -> None:
+        """
+        Insert many notifications in the caller's transaction.
+        
+        Large batches are streamed with COPY; smaller ones use a single
+        multi-row INSERT, which is cheaper below ``COPY_THRESHOLD`` rows.
+        
+        Args:
+            records: Dicts with user_id, type, title, message and optional metadata
+            db: Database session
+            send_email: Whether to send email notifications
+        """
+        if not records:
+            return
+        
+        rows = [
+            {
+                "id": uuid7(),
+                "user_id": UUID(str(record["user_id"])),
+                "type": NotificationType(record["type"]).value,
+                "title": record["title"],
+                "message": record["message"],
+                "is_read": False,
+                "metadata": record.get("metadata") or {}
+            }
+            for record in records
+        ]
+        
+        if len(rows) >= COPY_THRESHOLD:
+            connection = await db.connection()
+            raw = await connection.get_raw_connection()
+            columns = list(rows[0])
+            await raw.driver_connection.copy_records_to_table(
+                Notification.__tablename__,
+                records=[
+                    tuple(json.dumps(row[c]) if c == "metadata" else row[c] for c in columns)
+                    for row in rows
+                ],
+                columns=columns
+            )
+        else:
+            await db.execute(insert(Notification.__table__).values(rows))
+        
+        # One NOTIFY statement for the whole batch, delivered on commit
+        await db.execute(
+            text("SELECT pg_notify(c, p) FROM unnest(CAST(:channels AS text[]), CAST(:payloads AS text[])) AS t(c, p)"),
+            {
+                "channels": [channel_for(row["user_id"]) for row in rows],
+                "payloads": [
+                    json.dumps({"id": str(row["id"]), "type": row["type"], "title": row["title"]})
+                    for row in rows
+                ]
+            }
+        )
+        
+        if send_email and self.smtp_username and self.smtp_password:
+            for row in rows:
+                await self._send_email_notification(row["user_id"], row["title"], row["message"], db)
+        
+        logger.info(f"Created {len(rows)} notifications in bulk")
+    
+    async def create_notification_standalone(self, **kwargs) -> None:
+        """
+        Create a notification on a dedicated short-lived session.
+        
+        Intended for background tasks that run after the request's own
+        session has been closed. Errors are logged and swallowed.
+        
+        Args:
+            **kwargs: Arguments accepted by create_notification (except db)
+        """
+        try:
+            async with AsyncSessionLocal() as db:
+                await self.create_notification(db=db, **kwargs)
+        except Exception as e:
+            logger.error(f"Error creating notification in background: {e}")
+    
     async def get_user_notifications(
         self,
-        user_id: str,
+        user_id: UUID,
         db: AsyncSession,
         unread_only: bool = False,
         limit: int = 50,
-        offset: int = 0
-    ) -> tuple[List[Notification], int]:
+        offset: int = 0,
+        cursor: Optional[Tuple[datetime, UUID]] = None
+    ) -> Tuple[List[Notification], Optional[int], Optional[str]]:
         """
         Get notifications for a user.
         
@@ -99,42 +205,84 @@ class NotificationService:
             db: Database session
             unread_only: Whether to return only unread notifications
             limit: Maximum number of results
-            offset: Offset for pagination
+            offset: Offset for pagination (ignored when cursor is given)
+            cursor: Decoded ``(created_at, id)`` of the last-seen row
             
         Returns:
-            tuple[List[Notification], int]: Notifications and total count
+            Tuple[List[Notification], Optional[int], Optional[str]]: Notifications,
+            total count (None in cursor mode) and next page cursor
         """
         try:
-            # Build query
-            query = select(Notification).where(Notification.user_id == user_id)
-            
-            if unread_only:
-                query = query.where(Notification.is_read == False)
-            
-            query = query.order_by(Notification.created_at.desc())
-            
-            # Get total count
-            count_query = select(func.count(Notification.id)).where(Notification.user_id == user_id)
+            filters = [Notification.user_id == user_id]
             if unread_only:
-                count_query = count_query.where(Notification.is_read == False)
+                filters.append(Notification.is_read == False)
             
-            count_result = await db.execute(count_query)
-            total_count = count_result.scalar()
-            
-            # Get paginated results
-            result = await db.execute(query.offset(offset).limit(limit))
-            notifications = result.scalars().all()
-            
-            return notifications, total_count
+            return await self._fetch_notification_page(
+                and_(*filters), f"{user_id}:unread={unread_only}", db, limit, offset, cursor
+            )
             
         except Exception as e:
             logger.error(f"Error getting user notifications: {e}")
-            return [], 0
+            return [], 0, None
+    
+    async def _fetch_notification_page(
+        self,
+        filters,
+        count_key: str,
+        db: AsyncSession,
+        limit: int,
+        offset: int,
+        cursor: Optional[Tuple[datetime, UUID]]
+    ) -> Tuple[List[Notification], Optional[int], Optional[str]]:
+        """
+        Fetch one page of notifications ordered newest first.
+        
+        Cursor requests seek past the last-seen row and skip the count. The
+        legacy offset path counts through a short-lived Redis cache so that
+        paging through a result set does not recount it on every page.
+        
+        Args:
+            filters: Filter clause for the notifications
+            count_key: Cache key suffix identifying the filter set
+            db: Database session
+            limit: Maximum number of results
+            offset: Offset for pagination (ignored when cursor is given)
+            cursor: Decoded ``(created_at, id)`` of the last-seen row
+            
+        Returns:
+            Tuple[List[Notification], Optional[int], Optional[str]]: Notifications,
+            total count and next page cursor
+        """
+        query = (
+            select(Notification)
+            .where(filters)
+            .order_by(Notification.created_at.desc(), Notification.id.desc())
+            .limit(limit + 1)
+        )
+        
+        if cursor:
+            result = await db.execute(
+                query.where(tuple_(Notification.created_at, Notification.id) < tuple_(*cursor))
+            )
+            notifications, next_cursor = next_cursor_for(result.scalars().all(), limit, "created_at")
+            return notifications, None, next_cursor
+        
+        async def count() -> int:
+            return await exact_count(db, select(Notification.id).where(filters))
+        
+        total_count = await cache_get_or_set(
+            f"count:notifications:{count_key}", ttl=settings.count_cache_ttl, loader=count
+        )
+        
+        result = await db.execute(query.offset(offset))
+        notifications, next_cursor = next_cursor_for(result.scalars().all(), limit, "created_at")
+        
+        return notifications, total_count, next_cursor
     
     async def mark_notification_read(
         self,
-        notification_id: str,
-        user_id: str,
+        notification_id: UUID,
+        user_id: UUID,
         db: AsyncSession
     ) -> bool:
         """
@@ -160,16 +308,18 @@ class NotificationService:
                 )
                 .values(
                     is_read=True,
-                    read_at=datetime.utcnow()
+                    read_at=func.coalesce(Notification.read_at, func.now())
                 )
+                .returning(Notification.id)
+                .execution_options(synchronize_session=False)
             )
             
-            if result.rowcount > 0:
-                await db.commit()
-                logger.info(f"Marked notification {notification_id} as read")
-                return True
-            else:
+            if result.scalar_one_or_none() is None:
                 return False
+            
+            await db.commit()
+            logger.info(f"Marked notification {notification_id} as read")
+            return True
                 
         except Exception as e:
             logger.error(f"Error marking notification as read: {e}")
@@ -178,7 +328,7 @@ class NotificationService:
     
     async def mark_all_notifications_read(
         self,
-        user_id: str,
+        user_id: UUID,
         db: AsyncSession
     ) -> int:
         """
@@ -203,8 +353,9 @@ class NotificationService:
                 )
                 .values(
                     is_read=True,
-                    read_at=datetime.utcnow()
+                    read_at=func.now()
                 )
+                .execution_options(synchronize_session=False)
             )
             
             updated_count = result.rowcount
@@ -218,7 +369,7 @@ class NotificationService:
             await db.rollback()
             return 0
     
-    async def get_unread_count(self, user_id: str, db: AsyncSession) -> int:
+    async def get_unread_count(self, user_id: UUID, db: AsyncSession) -> int:
         """
         Get count of unread notifications for a user.
         
@@ -230,14 +381,9 @@ class NotificationService:
             int: Count of unread notifications
         """
         try:
+            # Trigger-maintained counter; avoids counting notifications per poll
             result = await db.execute(
-                select(func.count(Notification.id))
-                .where(
-                    and_(
-                        Notification.user_id == user_id,
-                        Notification.is_read == False
-                    )
-                )
+                select(User.unread_notification_count).where(User.id == user_id)
             )
             return result.scalar() or 0
             
@@ -263,21 +409,14 @@ class NotificationService:
         try:
             cutoff_date = datetime.utcnow() - timedelta(days=days_old)
             
-            # Get count of notifications to delete
-            count_result = await db.execute(
-                select(func.count(Notification.id))
-                .where(Notification.created_at < cutoff_date)
-            )
-            count = count_result.scalar() or 0
-            
-            # Delete old notifications
-            if count > 0:
-                await db.execute(
-                    Notification.__table__.delete().where(
-                        Notification.created_at < cutoff_date
-                    )
+            # Delete old notifications; the row count comes back with the DELETE
+            result = await db.execute(
+                Notification.__table__.delete().where(
+                    Notification.created_at < cutoff_date
                 )
-                await db.commit()
+            )
+            await db.commit()
+            count = result.rowcount
             
             logger.info(f"Deleted {count} old notifications")
             return count
@@ -289,7 +428,7 @@ class NotificationService:
     
     async def _send_email_notification(
         self,
-        user_id: str,
+        user_id: UUID,
         title: str,
         message: str,
         db: AsyncSession
@@ -548,8 +687,8 @@ class NotificationService:
     
     async def get_notification_by_id(
         self,
-        notification_id: str,
-        user_id: str,
+        notification_id: UUID,
+        user_id: UUID,
         db: AsyncSession
     ) -> Optional[Notification]:
         """
@@ -581,11 +720,11 @@ class NotificationService:
     
     async def update_notification(
         self,
-        notification_id: str,
-        user_id: str,
+        notification_id: UUID,
+        user_id: UUID,
         update_data: Dict[str, Any],
         db: AsyncSession
-    ) -> bool:
+    ) -> Optional[Notification]:
         """
         Update a notification.
         
@@ -596,9 +735,12 @@ class NotificationService:
             db: Database session
             
         Returns:
-            bool: True if successful, False otherwise
+            Optional[Notification]: Updated notification, or None if not found
         """
         try:
+            if "is_read" in update_data:
+                update_data["read_at"] = func.now() if update_data["is_read"] else None
+            
             result = await db.execute(
                 update(Notification)
                 .where(
@@ -608,24 +750,27 @@ class NotificationService:
                     )
                 )
                 .values(**update_data)
+                .returning(Notification)
+                .execution_options(synchronize_session=False)
             )
+            notification = result.scalar_one_or_none()
             
-            if result.rowcount > 0:
-                await db.commit()
-                logger.info(f"Updated notification {notification_id}")
-                return True
-            else:
-                return False
+            if not notification:
+                return None
+            
+            await db.commit()
+            logger.info(f"Updated notification {notification_id}")
+            return notification
                 
         except Exception as e:
             logger.error(f"Error updating notification: {e}")
             await db.rollback()
-            return False
+            return None
     
     async def delete_notification(
         self,
-        notification_id: str,
-        user_id: str,
+        notification_id: UUID,
+        user_id: UUID,
         db: AsyncSession
     ) -> bool:
         """
@@ -663,12 +808,13 @@ class NotificationService:
     
     async def get_notifications_by_type(
         self,
-        user_id: str,
+        user_id: UUID,
         notification_type: NotificationType,
         db: AsyncSession,
         limit: int = 50,
-        offset: int = 0
-    ) -> tuple[List[Notification], int]:
+        offset: int = 0,
+        cursor: Optional[Tuple[datetime, UUID]] = None
+    ) -> Tuple[List[Notification], Optional[int], Optional[str]]:
         """
         Get notifications by type for a user.
         
@@ -677,42 +823,26 @@ class NotificationService:
             notification_type: Type of notifications to get
             db: Database session
             limit: Maximum number of results
-            offset: Offset for pagination
+            offset: Offset for pagination (ignored when cursor is given)
+            cursor: Decoded ``(created_at, id)`` of the last-seen row
             
         Returns:
-            tuple[List[Notification], int]: Notifications and total count
+            Tuple[List[Notification], Optional[int], Optional[str]]: Notifications,
+            total count (None in cursor mode) and next page cursor
         """
         try:
-            # Build query
-            query = select(Notification).where(
-                and_(
-                    Notification.user_id == user_id,
-                    Notification.type == notification_type
-                )
+            filters = and_(
+                Notification.user_id == user_id,
+                Notification.type == notification_type
             )
             
-            query = query.order_by(Notification.created_at.desc())
-            
-            # Get total count
-            count_query = select(func.count(Notification.id)).where(
-                and_(
-                    Notification.user_id == user_id,
-                    Notification.type == notification_type
-                )
+            return await self._fetch_notification_page(
+                filters, f"{user_id}:type={notification_type.value}", db, limit, offset, cursor
             )
             
-            count_result = await db.execute(count_query)
-            total_count = count_result.scalar()
-            
-            # Get paginated results
-            result = await db.execute(query.offset(offset).limit(limit))
-            notifications = result.scalars().all()
-            
-            return notifications, total_count
-            
         except Exception as e:
             logger.error(f"Error getting notifications by type: {e}")
-            return [], 0
+            return [], 0, None
     
     async def send_test_email(
         self,
@@ -772,7 +902,7 @@ class NotificationService:
     
     async def get_notification_statistics(
         self,
-        user_id: str,
+        user_id: UUID,
         db: AsyncSession,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None
@@ -855,7 +985,7 @@ class NotificationService:
     
     async def mark_notifications_by_type_read(
         self,
-        user_id: str,
+        user_id: UUID,
         notification_type: NotificationType,
         db: AsyncSession
     ) -> int:
@@ -883,8 +1013,9 @@ class NotificationService:
                 )
                 .values(
                     is_read=True,
-                    read_at=datetime.utcnow()
+                    read_at=func.now()
                 )
+                .execution_options(synchronize_session=False)
             )
             
             updated_count = result.rowcount
@@ -940,11 +1071,11 @@ class NotificationService:
             for user in users:
                 try:
                     notification = Notification(
-                        user_id=str(user.id),
+                        user_id=user.id,
                         type=notification_type,
                         title=title,
                         message=message,
-                        metadata=metadata or {}
+                        meta=metadata or {}
                     )
                     
                     db.add(notification)
@@ -953,7 +1084,7 @@ class NotificationService:
                     # Send email if requested
                     if send_email and user.email:
                         await self._send_email_notification(
-                            user_id=str(user.id),
+                            user_id=user.id,
                             title=title,
                             message=message,
                             db=db
@@ -975,7 +1106,7 @@ class NotificationService:
     
     async def get_recent_notifications(
         self,
-        user_id: str,
+        user_id: UUID,
         db: AsyncSession,
         hours: int = 24,
         limit: int = 10
@@ -1040,11 +1171,11 @@ class NotificationService:
                         Notification.is_read == True  # Only archive read notifications
                     )
                 )
-                .values(metadata=func.jsonb_set(
-                    Notification.metadata,
+                .values({Notification.meta: func.jsonb_set(
+                    Notification.meta,
                     '{archived}',
                     'true'
-                ))
+                )})
             )
             
             archived_count = result.rowcount
@@ -0,0 +1,174 @@
+"""
+Notification push service for the Expense Management System.
+Fans PostgreSQL NOTIFY events out to connected server-sent event clients.
+"""
+
+import asyncio
+import logging
+from typing import Dict, Optional, Set
+from uuid import UUID
+
+import asyncpg
+from sqlalchemy.engine import make_url
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def channel_for(user_id) -> str:
+    """
+    Get the NOTIFY channel name for a user.
+
+    Args:
+        user_id: ID of the user
+
+    Returns:
+        str: Channel name
+    """
+    return f"notifications_{UUID(str(user_id)).hex}"
+
+
+def _listen_dsn() -> str:
+    """DSN for the LISTEN connection, as plain asyncpg expects it."""
+    url = make_url(settings.notification_listen_url or settings.database_url)
+    return url.set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+class NotificationStream:
+    """
+    Shares one LISTEN connection across all streaming clients of a process.
+
+    The connection is opened directly with asyncpg rather than taken from the
+    engine pool, so pool recycling never closes it. If it is lost anyway it
+    is reopened and every subscribed channel is listened to again. LISTEN
+    needs a session-level connection: behind PgBouncer in transaction pooling
+    mode, NOTIFICATION_LISTEN_URL must point at PostgreSQL directly.
+    """
+
+    def __init__(self, queue_size: int = 100, reconnect_delay: float = 1.0, max_reconnect_delay: float = 30.0):
+        self.queue_size = queue_size
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._driver_connection: Optional[asyncpg.Connection] = None
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._lock = asyncio.Lock()
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    async def subscribe(self, user_id) -> asyncio.Queue:
+        """
+        Register a client for a user's notification events.
+
+        The first subscriber for a user issues LISTEN on that user's channel.
+
+        Args:
+            user_id: ID of the user
+
+        Returns:
+            asyncio.Queue: Queue receiving the JSON payload of each event
+        """
+        channel = channel_for(user_id)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+
+        async with self._lock:
+            self._closed = False
+            if self._driver_connection is None or self._driver_connection.is_closed():
+                await self._connect()
+
+            subscribers = self._subscribers.setdefault(channel, set())
+            if not subscribers:
+                await self._driver_connection.add_listener(channel, self._dispatch)
+            subscribers.add(queue)
+
+        return queue
+
+    async def unsubscribe(self, user_id, queue: asyncio.Queue) -> None:
+        """
+        Remove a client; the last one for a user issues UNLISTEN.
+
+        Args:
+            user_id: ID of the user
+            queue: Queue returned by subscribe
+        """
+        channel = channel_for(user_id)
+
+        async with self._lock:
+            subscribers = self._subscribers.get(channel)
+            if not subscribers:
+                return
+
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[channel]
+                if self._driver_connection is None:
+                    return  # lost; the reconnect only listens on remaining channels
+                try:
+                    await self._driver_connection.remove_listener(channel, self._dispatch)
+                except Exception as e:
+                    logger.error(f"Error removing notification listener: {e}")
+
+    async def close(self) -> None:
+        """Close the listening connection."""
+        async with self._lock:
+            self._closed = True
+            self._subscribers.clear()
+            if self._reconnect_task is not None:
+                self._reconnect_task.cancel()
+                self._reconnect_task = None
+            if self._driver_connection is not None:
+                await self._driver_connection.close()
+            self._driver_connection = None
+
+    async def _connect(self) -> None:
+        """Open the listening connection and LISTEN on every subscribed channel."""
+        if settings.db_use_pgbouncer and not settings.notification_listen_url:
+            logger.warning("DB_USE_PGBOUNCER is on without NOTIFICATION_LISTEN_URL; LISTEN may not receive events")
+
+        connection = await asyncpg.connect(_listen_dsn())
+        connection.add_termination_listener(self._on_termination)
+        for channel in self._subscribers:
+            await connection.add_listener(channel, self._dispatch)
+        self._driver_connection = connection
+
+    def _on_termination(self, connection) -> None:
+        """asyncpg termination callback; schedules a reconnect if still in use."""
+        if connection is not self._driver_connection or self._closed:
+            return
+
+        logger.warning("Notification listen connection lost, reconnecting")
+        self._driver_connection = None
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        """Reopen the listening connection with backoff until it succeeds."""
+        delay = self.reconnect_delay
+
+        while True:
+            async with self._lock:
+                if self._closed or not self._subscribers:
+                    return  # the next subscriber connects lazily
+                if self._driver_connection is not None and not self._driver_connection.is_closed():
+                    return
+                try:
+                    await self._connect()
+                    logger.info(f"Notification listen connection restored for {len(self._subscribers)} channels")
+                    return
+                except Exception as e:
+                    logger.error(f"Error reconnecting notification listener: {e}")
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def _dispatch(self, connection, pid: int, channel: str, payload: str) -> None:
+        """asyncpg listener callback; hands the payload to every subscriber."""
+        for queue in self._subscribers.get(channel, ()):
+            try:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                logger.warning(f"Dropping notification event for slow client on {channel}")
+
+
+# Global notification stream instance
+notification_stream = NotificationStream()
@@ -3,11 +3,12 @@ OCR (Optical Character Recognition) service for receipt processing.
 Extracts text and structured data from receipt images for expense management.
 """
 
+import io
 import logging
 import re
 from datetime import date, datetime
 from decimal import Decimal, InvalidOperation
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, BinaryIO, Union
 from pathlib import Path
 
 import pytesseract
@@ -47,9 +48,34 @@ class OCRService:
         Returns:
             Dict[str, Any]: Extracted data including amount, currency, date, etc.
         """
+        return await self._process(image_path, image_path)
+    
+    async def process_receipt_bytes(self, data: bytes) -> Dict[str, Any]:
+        """
+        Process an in-memory receipt image without writing it to disk.
+        
+        Args:
+            data: Encoded image content
+            
+        Returns:
+            Dict[str, Any]: Extracted data including amount, currency, date, etc.
+        """
+        return await self._process(io.BytesIO(data), "<uploaded image>")
+    
+    async def _process(self, image_source: Union[str, BinaryIO], description: str) -> Dict[str, Any]:
+        """
+        Run the OCR pipeline on an image path or file object.
+        
+        Args:
+            image_source: Path or binary file object accepted by PIL
+            description: How to refer to the image in logs
+            
+        Returns:
+            Dict[str, Any]: Extracted data, or an error result on failure
+        """
         try:
             # Load and preprocess image
-            processed_image = await self._preprocess_image(image_path)
+            processed_image = await self._preprocess_image(image_source)
             
             # Extract text using OCR
             raw_text = await self._extract_text(processed_image)
@@ -70,7 +96,7 @@ class OCRService:
             }
             
         except Exception as e:
-            logger.error(f"Error processing receipt {image_path}: {e}")
+            logger.error(f"Error processing receipt {description}: {e}")
             return {
                 "raw_text": "",
                 "detected_amount": None,
@@ -80,18 +106,18 @@ class OCRService:
                 "error": str(e)
             }
     
-    async def _preprocess_image(self, image_path: str) -> Image.Image:
+    async def _preprocess_image(self, image_source: Union[str, BinaryIO]) -> Image.Image:
         """
         Preprocess image for better OCR results.
         
         Args:
-            image_path: Path to the image file
+            image_source: Path to the image file or a binary file object
             
         Returns:
             Image.Image: Preprocessed image
         """
         # Load image
-        image = Image.open(image_path)
+        image = Image.open(image_source)
         
         # Convert to RGB if necessary
         if image.mode != 'RGB':
@@ -227,6 +227,62 @@ def backup_database():
         }
 
 
+@celery_app.task(name='app.tasks.cleanup_tasks.nightly_maintenance')
+def nightly_maintenance(notification_days_old: int = 30, audit_log_days_old: int = 365):
+    """
+    Run the nightly backup and cleanup jobs as a single task.
+    
+    The backup runs first so it still contains the rows about to be purged;
+    upcoming audit log partitions are created, then both cleanups share one
+    database session.
+    
+    Args:
+        notification_days_old: Delete notifications older than this many days
+        audit_log_days_old: Delete audit logs older than this many days
+    """
+    logger.info("Starting nightly maintenance")
+    
+    backup_result = backup_database()
+    
+    async def cleanup():
+        await audit_service.ensure_partitions()
+        
+        async with AsyncSessionLocal() as db:
+            notifications_deleted = await notification_service.delete_old_notifications(
+                days_old=notification_days_old,
+                db=db
+            )
+            audit_logs_deleted = await audit_service.cleanup_old_logs(
+                db=db,
+                days_old=audit_log_days_old
+            )
+            return notifications_deleted, audit_logs_deleted
+    
+    try:
+        # Run async function
+        import asyncio
+        notifications_deleted, audit_logs_deleted = asyncio.run(cleanup())
+        
+        logger.info(
+            f"Nightly maintenance completed. {notifications_deleted} notifications and "
+            f"{audit_logs_deleted} audit logs deleted."
+        )
+        return {
+            'status': 'success',
+            'backup': backup_result,
+            'notifications_deleted': notifications_deleted,
+            'audit_logs_deleted': audit_logs_deleted
+        }
+        
+    except Exception as e:
+        logger.error(f"Nightly maintenance cleanup failed: {e}")
+        return {
+            'status': 'error',
+            'backup': backup_result,
+            'message': str(e)
+        }
+
+
 @celery_app.task(name='app.tasks.cleanup_tasks.optimize_database')
 def optimize_database():
     """
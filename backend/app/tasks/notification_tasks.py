@@ -11,7 +11,7 @@ from app.database import AsyncSessionLocal
 logger = logging.getLogger(__name__)
 
 
-@celery_app.task(name='app.tasks.notification_tasks.send_email_notification')
+@celery_app.task(ignore_result=False, name='app.tasks.notification_tasks.send_email_notification')
 def send_email_notification(user_id: str, subject: str, message: str, html_content: str = None):
     """
     Send email notification to user.
@@ -129,7 +129,7 @@ def check_overdue_approvals():
                         # Send notifications for each overdue approval
                         for approval in overdue_approvals:
                             await notification_service.create_notification(
-                                user_id=str(approval.approver_id),
+                                user_id=approval.approver_id,
                                 type="overdue_approval",
                                 title="Overdue Approval Required",
                                 message=f"Expense '{approval.expense.description}' approval is overdue",
@@ -194,7 +194,7 @@ def send_weekly_reports():
                         
                         # Create notification
                         await notification_service.create_notification(
-                            user_id=str(user.id),
+                            user_id=user.id,
                             type="weekly_report",
                             title="Weekly Expense Report",
                             message=f"Your weekly expense report is ready. Total expenses: ${report_data.get('total_expenses', 0)}",
@@ -12,7 +12,7 @@ from app.models import Expense, OCRResult
 logger = logging.getLogger(__name__)
 
 
-@celery_app.task(bind=True, name='app.tasks.ocr_tasks.process_receipt_ocr')
+@celery_app.task(bind=True, ignore_result=False, name='app.tasks.ocr_tasks.process_receipt_ocr')
 def process_receipt_ocr(self, expense_id: str, receipt_url: str):
     """
     Process receipt image with OCR in the background.
@@ -4,7 +4,7 @@ Handles environment variables and application settings.
 """
 
 import os
-from typing import List, Optional
+from typing import FrozenSet, List, Optional
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -22,12 +22,28 @@ class Settings(BaseSettings):
     database_name: str = Field(default="expense_management", env="DATABASE_NAME")
     database_user: str = Field(default="user", env="DATABASE_USER")
     database_password: str = Field(default="password", env="DATABASE_PASSWORD")
+    # Paginated endpoints hold two connections per request (page + count)
+    db_pool_size: int = Field(default=20, env="DB_POOL_SIZE")
+    db_max_overflow: int = Field(default=40, env="DB_MAX_OVERFLOW")
+    db_pool_timeout: int = Field(default=10, env="DB_POOL_TIMEOUT")
+    # Disable SQLAlchemy's pool and leave pooling to PgBouncer
+    db_use_pgbouncer: bool = Field(default=False, env="DB_USE_PGBOUNCER")
+    # Direct PostgreSQL URL for the notification LISTEN connection (defaults to DATABASE_URL);
+    # LISTEN does not survive PgBouncer transaction pooling, so set this when DB_USE_PGBOUNCER is on
+    notification_listen_url: Optional[str] = Field(default=None, env="NOTIFICATION_LISTEN_URL")
+    # Statement caches are turned off automatically when DB_USE_PGBOUNCER is on
+    db_statement_cache_size: int = Field(default=1024, env="DB_STATEMENT_CACHE_SIZE")
+    db_query_cache_size: int = Field(default=2000, env="DB_QUERY_CACHE_SIZE")
     
     # Security Configuration
     secret_key: str = Field(default="your-super-secret-key-change-in-production", env="SECRET_KEY")
     algorithm: str = Field(default="HS256", env="ALGORITHM")
     access_token_expire_minutes: int = Field(default=30, env="ACCESS_TOKEN_EXPIRE_MINUTES")
     refresh_token_expire_days: int = Field(default=7, env="REFRESH_TOKEN_EXPIRE_DAYS")
+    # Argon2id cost parameters (memory in KiB); weaker stored hashes are upgraded on the next login
+    argon2_time_cost: int = Field(default=2, env="ARGON2_TIME_COST")
+    argon2_memory_cost: int = Field(default=65536, env="ARGON2_MEMORY_COST")
+    argon2_parallelism: int = Field(default=1, env="ARGON2_PARALLELISM")
     
     # Email Configuration
     smtp_host: str = Field(default="smtp.gmail.com", env="SMTP_HOST")
@@ -40,10 +56,12 @@ class Settings(BaseSettings):
     # File Storage Configuration
     upload_dir: str = Field(default="./uploads", env="UPLOAD_DIR")
     max_file_size: int = Field(default=10485760, env="MAX_FILE_SIZE")  # 10MB
-    allowed_extensions: List[str] = Field(default=["jpg", "jpeg", "png", "pdf"], env="ALLOWED_EXTENSIONS")
+    allowed_extensions: FrozenSet[str] = Field(default=frozenset({"jpg", "jpeg", "png", "pdf"}), env="ALLOWED_EXTENSIONS")
     
     # Redis Configuration
     redis_url: str = Field(default="redis://localhost:6379/0", env="REDIS_URL")
+    stats_cache_ttl: int = Field(default=60, env="STATS_CACHE_TTL")
+    count_cache_ttl: int = Field(default=30, env="COUNT_CACHE_TTL")
     
     # External API Configuration
     exchange_rate_api_key: str = Field(default="", env="EXCHANGE_RATE_API_KEY")
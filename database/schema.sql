@@ -34,6 +34,7 @@ CREATE TABLE users (
     is_active BOOLEAN DEFAULT TRUE,
     must_change_password BOOLEAN DEFAULT TRUE,
     last_login TIMESTAMP WITH TIME ZONE,
+    unread_notification_count INTEGER NOT NULL DEFAULT 0,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     created_by UUID REFERENCES users(id)
@@ -47,7 +48,9 @@ CREATE TABLE expense_categories (
     description TEXT,
     is_active BOOLEAN DEFAULT TRUE,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-    created_by UUID NOT NULL REFERENCES users(id)
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    created_by UUID NOT NULL REFERENCES users(id),
+    CONSTRAINT uq_expense_categories_company_name UNIQUE (company_id, name)
 );
 
 -- Approval rules (configurable per category)
@@ -61,6 +64,7 @@ CREATE TABLE approval_rules (
     order_index INTEGER DEFAULT 0,
     is_active BOOLEAN DEFAULT TRUE,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     created_by UUID NOT NULL REFERENCES users(id)
 );
 
@@ -108,6 +112,7 @@ CREATE TABLE currency_rates (
     rate DECIMAL(10,6) NOT NULL,
     rate_date DATE NOT NULL,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     UNIQUE(from_currency, to_currency, rate_date)
 );
 
@@ -122,7 +127,9 @@ CREATE TABLE ocr_results (
     confidence_score DECIMAL(3,2),
     raw_text TEXT,
     processed_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-    is_verified BOOLEAN DEFAULT FALSE
+    is_verified BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
 -- Notifications table
@@ -135,12 +142,15 @@ CREATE TABLE notifications (
     is_read BOOLEAN DEFAULT FALSE,
     metadata JSONB,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     read_at TIMESTAMP WITH TIME ZONE
 );
 
 -- Audit logs for all system actions
+-- Partitioned by month so retention drops whole partitions and time-bounded
+-- queries only scan the months they touch
 CREATE TABLE audit_logs (
-    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    id UUID NOT NULL DEFAULT uuid_generate_v4(),
     company_id UUID REFERENCES companies(id) ON DELETE CASCADE,
     user_id UUID REFERENCES users(id) ON DELETE SET NULL,
     action audit_action NOT NULL,
@@ -150,24 +160,59 @@ CREATE TABLE audit_logs (
     new_values JSONB,
     ip_address INET,
     user_agent TEXT,
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-);
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT;
+
+-- Monthly partitions for the current and next two months; the nightly
+-- maintenance task keeps creating them ahead of time
+DO $$
+DECLARE
+    month_start DATE;
+BEGIN
+    FOR i IN 0..2 LOOP
+        month_start := (date_trunc('month', CURRENT_DATE) + make_interval(months => i))::DATE;
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF audit_logs FOR VALUES FROM (%L) TO (%L)',
+            'audit_logs_y' || to_char(month_start, 'YYYY') || 'm' || to_char(month_start, 'MM'),
+            month_start,
+            (month_start + INTERVAL '1 month')::DATE
+        );
+    END LOOP;
+END $$;
 
 -- Create indexes for performance optimization
 CREATE INDEX idx_users_company_email ON users(company_id, email);
 CREATE INDEX idx_users_role ON users(role);
+CREATE UNIQUE INDEX idx_users_email_lower ON users(lower(email));
 CREATE INDEX idx_expenses_user_status ON expenses(user_id, status);
 CREATE INDEX idx_expenses_company_date ON expenses(company_id, expense_date);
+CREATE INDEX idx_expenses_company_user_date ON expenses(company_id, user_id, expense_date DESC);
+CREATE INDEX idx_expenses_company_created ON expenses(company_id, created_at DESC, id DESC);
+-- Employee listing (company, user) in keyset order; an optional status filter is checked per fetched row
+CREATE INDEX idx_expenses_company_user_created ON expenses(company_id, user_id, created_at DESC, id DESC);
 CREATE INDEX idx_expenses_category ON expenses(category_id);
+-- Lets per-status date-range aggregates of base-currency amounts run as index-only scans
+CREATE INDEX idx_expenses_company_status_date_covering ON expenses(company_id, status, expense_date)
+    INCLUDE (amount_in_base_currency, currency);
+-- Drafts have no submitted_at; only submitted expenses are indexed
+CREATE INDEX idx_expenses_submitted_at ON expenses(submitted_at) WHERE submitted_at IS NOT NULL;
 CREATE INDEX idx_approvals_expense_status ON approvals(expense_id, status);
-CREATE INDEX idx_approvals_approver ON approvals(approver_id, status);
+-- Resolved approvals pile up forever; the pending queue only indexes the live working set
+CREATE INDEX idx_approvals_approver_pending ON approvals(approver_id, created_at DESC, id DESC) WHERE status = 'pending';
+CREATE INDEX idx_approvals_approver_approved ON approvals(approver_id, approved_at DESC, id DESC);
 CREATE INDEX idx_currency_rates_date ON currency_rates(rate_date);
 CREATE INDEX idx_currency_rates_currencies ON currency_rates(from_currency, to_currency);
-CREATE INDEX idx_notifications_user_unread ON notifications(user_id, is_read);
+CREATE INDEX idx_notifications_user_created ON notifications(user_id, created_at DESC, id DESC);
+CREATE INDEX idx_notifications_unread_partial ON notifications(user_id, created_at DESC) WHERE is_read = false;
 CREATE INDEX idx_audit_logs_company_date ON audit_logs(company_id, created_at);
 CREATE INDEX idx_audit_logs_user_date ON audit_logs(user_id, created_at);
-CREATE INDEX idx_approval_rules_category ON approval_rules(category_id);
+CREATE INDEX idx_approval_rules_category_order ON approval_rules(category_id, order_index);
 CREATE INDEX idx_approval_rules_user ON approval_rules(user_id);
+CREATE INDEX idx_approval_rules_company ON approval_rules(company_id);
 
 -- Create triggers for updated_at timestamps
 CREATE OR REPLACE FUNCTION update_updated_at_column()
@@ -179,10 +224,70 @@ END;
 $$ language 'plpgsql';
 
 CREATE TRIGGER update_companies_updated_at BEFORE UPDATE ON companies FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
-CREATE TRIGGER update_users_updated_at BEFORE UPDATE ON users FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+-- Counter maintenance by the notifications trigger is not a user edit
+CREATE TRIGGER update_users_updated_at BEFORE UPDATE ON users FOR EACH ROW
+    WHEN (OLD.unread_notification_count IS NOT DISTINCT FROM NEW.unread_notification_count)
+    EXECUTE FUNCTION update_updated_at_column();
 CREATE TRIGGER update_expenses_updated_at BEFORE UPDATE ON expenses FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 CREATE TRIGGER update_approvals_updated_at BEFORE UPDATE ON approvals FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+-- Keep users.unread_notification_count in step with unread notifications
+CREATE OR REPLACE FUNCTION maintain_unread_notification_count()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Statement-level: one UPDATE per affected user, however many rows changed
+    IF TG_OP = 'INSERT' THEN
+        UPDATE users
+        SET unread_notification_count = users.unread_notification_count + delta.unread
+        FROM (
+            SELECT user_id, count(*) AS unread FROM new_rows
+            WHERE NOT COALESCE(is_read, FALSE) GROUP BY user_id
+        ) AS delta
+        WHERE users.id = delta.user_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE users
+        SET unread_notification_count = users.unread_notification_count - delta.unread
+        FROM (
+            SELECT user_id, count(*) AS unread FROM old_rows
+            WHERE NOT COALESCE(is_read, FALSE) GROUP BY user_id
+        ) AS delta
+        WHERE users.id = delta.user_id;
+    ELSE
+        UPDATE users
+        SET unread_notification_count = users.unread_notification_count + delta.unread
+        FROM (
+            SELECT user_id, sum(change) AS unread FROM (
+                SELECT user_id, 1 AS change FROM new_rows WHERE NOT COALESCE(is_read, FALSE)
+                UNION ALL
+                SELECT user_id, -1 FROM old_rows WHERE NOT COALESCE(is_read, FALSE)
+            ) AS changes
+            GROUP BY user_id
+            HAVING sum(change) <> 0
+        ) AS delta
+        WHERE users.id = delta.user_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+-- Transition tables need one trigger per event, and no UPDATE OF column list
+DROP TRIGGER IF EXISTS maintain_notifications_unread_count ON notifications;
+CREATE TRIGGER maintain_notifications_unread_count_insert AFTER INSERT ON notifications
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_unread_notification_count();
+CREATE TRIGGER maintain_notifications_unread_count_delete AFTER DELETE ON notifications
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_unread_notification_count();
+CREATE TRIGGER maintain_notifications_unread_count_update AFTER UPDATE ON notifications
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_unread_notification_count();
+
+-- Backfill counters for notifications that predate the triggers
+UPDATE users SET unread_notification_count = (
+    SELECT count(*) FROM notifications
+    WHERE notifications.user_id = users.id AND NOT COALESCE(notifications.is_read, FALSE)
+);
+
 -- Insert default currencies (ISO 4217 major currencies)
 INSERT INTO currency_rates (from_currency, to_currency, rate, rate_date) VALUES
 ('USD', 'USD', 1.000000, CURRENT_DATE),